@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "google-genai>=1.0.0",
+#     "openai>=1.99.0",
+#     "pillow>=10.0.0",
+# ]
+# ///
+"""
+Latency benchmark for the image generation scripts.
+
+Starts benchmarks/image-stub-server.py, points skills/nano-banana-pro and
+skills/gpt-image-1-5 at it through GOOGLE_GEMINI_BASE_URL and OPENAI_BASE_URL,
+and runs each script mode in a subprocess. For every mode it records the
+end-to-end time and peak RSS, and splits the run into stages using the
+request timings the stub server logs:
+
+    startup   process start until the first request reaches the server
+              (interpreter start, imports, client setup, input preprocessing)
+    api       first request received until the last response was sent
+              (stub latency, upload and download, concurrency)
+    finish    last response sent until the process exited
+              (response parsing, base64 and image decoding, encoding, writes)
+
+Usage:
+    uv run benchmarks/image-generation.py [options]
+
+Options:
+    --modes LIST        Comma-separated subset of modes (default: all)
+    --latency SECONDS   Stub server latency per request (default: 0.2)
+    --image-size SIZE   Force 1K, 2K or 4K responses (default: the size each request asks for)
+    --repeat N          Runs per measurement, the median is reported (default: 1)
+    --output FILE       Write JSON results to FILE
+    --baseline FILE     Compare against a previous JSON results file
+    --threshold PCT     Regression threshold in percent for --baseline (default: 10)
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+STUB_SERVER = Path(__file__).resolve().parent / "image-stub-server.py"
+SCRIPTS = {
+    "nano": ROOT / "skills" / "nano-banana-pro" / "scripts" / "generate_image.py",
+    "gpt": ROOT / "skills" / "gpt-image-1-5" / "scripts" / "generate_image.py",
+}
+
+BATCH_SIZE = 8
+
+# Each mode maps to (script, argument builder, prime). An argument builder
+# receives the fixtures directory and a per-run output directory. A prime,
+# if set, is an argument builder run unmeasured before each measured run,
+# e.g. to fill the result cache or start an editing session.
+MODES = {
+    "nano-generate-1k": ("nano", lambda f, o: ["-p", "a lighthouse", "-f", o / "out.png"], None),
+    "nano-generate-2k": ("nano", lambda f, o: ["-p", "a lighthouse", "-f", o / "out.png", "-r", "2K"], None),
+    "nano-generate-4k": ("nano", lambda f, o: ["-p", "a lighthouse", "-f", o / "out.png", "-r", "4K"], None),
+    "nano-webp": ("nano", lambda f, o: ["-p", "a lighthouse", "-f", o / "out.webp", "-r", "2K"], None),
+    "nano-thumbnail": ("nano", lambda f, o: ["-p", "a lighthouse", "-f", o / "out.png", "-r", "2K",
+                                             "-t", "256"], None),
+    "nano-edit": ("nano", lambda f, o: ["-p", "make it dusk", "-f", o / "out.png", "-i", f / "photo.jpg"], None),
+    "nano-edit-original": ("nano", lambda f, o: ["-p", "make it dusk", "-f", o / "out.png", "-i", f / "photo.jpg",
+                                                 "--upload-format", "original"], None),
+    "nano-batch": ("nano", lambda f, o: ["-b", f / "prompts.jsonl", "-c", "4"], None),
+    "nano-cached": ("nano", lambda f, o: ["-p", "a lighthouse", "-f", o / "out.png", "-r", "2K", "--cache"],
+                    lambda f, o: ["-p", "a lighthouse", "-f", o / "out.png", "-r", "2K", "--cache"]),
+    # The second turn of a session started by editing the photo
+    "nano-session": ("nano", lambda f, o: ["-s", "bench", "-p", "now add a boat", "-f", o / "out.png"],
+                     lambda f, o: ["-s", "bench", "-p", "make it dusk", "-f", o / "out.png", "-i", f / "photo.jpg"]),
+    "gpt-generate": ("gpt", lambda f, o: ["--prompt", "a lighthouse", "--filename", o / "out.png"], None),
+    "gpt-jpeg": ("gpt", lambda f, o: ["--prompt", "a lighthouse", "--filename", o / "out.jpg"], None),
+    "gpt-stream": ("gpt", lambda f, o: ["--prompt", "a lighthouse", "--filename", o / "out.png",
+                                        "--stream", "--partial-images", "2"], None),
+    "gpt-variants": ("gpt", lambda f, o: ["--prompt", "a lighthouse", "--filename", o / "out.png",
+                                          "--n", "4"], None),
+    "gpt-edit": ("gpt", lambda f, o: ["--prompt", "make it dusk", "--filename", o / "out.png",
+                                      "--input-image", f / "input.png"], None),
+    "gpt-edit-mask": ("gpt", lambda f, o: ["--prompt", "make it dusk", "--filename", o / "out.png",
+                                           "--input-image", f / "input.png", "--mask", f / "mask.png"], None),
+    "gpt-batch-edit": ("gpt", lambda f, o: ["--prompt", "make it dusk", "--input-image", f / "shots",
+                                            "--out-dir", o, "-c", "4"], None),
+}
+
+
+def make_fixtures(directory: Path):
+    """Write the input images and manifests the modes refer to."""
+    from PIL import Image
+
+    def noise(width: int, height: int) -> Image.Image:
+        return Image.merge("RGB", [Image.effect_noise((width, height), 48) for _ in range(3)])
+
+    # A 12 MP phone photo, the typical input for an edit
+    noise(4032, 3024).save(directory / "photo.jpg", quality=92)
+    noise(1024, 1024).save(directory / "input.png")
+    mask = Image.new("RGBA", (1024, 1024), (0, 0, 0, 255))
+    mask.paste((0, 0, 0, 0), (256, 256, 768, 768))
+    mask.save(directory / "mask.png")
+
+    shots = directory / "shots"
+    shots.mkdir()
+    for i in range(BATCH_SIZE):
+        noise(1024, 1024).save(shots / f"shot-{i}.png")
+
+    # Output paths are relative, so batch images land in the run's working directory
+    with open(directory / "prompts.jsonl", "w") as f:
+        for i in range(BATCH_SIZE):
+            f.write(json.dumps({"prompt": f"lighthouse number {i}", "filename": f"batch-{i}.png"}) + "\n")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def stub_request(base_url: str, path: str, method: str = "GET"):
+    request = urllib.request.Request(base_url + path, method=method, data=b"" if method == "POST" else None)
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def start_stub(port: int, latency: float, image_size: str | None) -> subprocess.Popen:
+    """Start the stub server and wait until it accepts requests."""
+    cmd = [sys.executable, str(STUB_SERVER), "--port", str(port), "--latency", str(latency), "--prewarm"]
+    if image_size:
+        cmd += ["--image-size", image_size]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    # Prewarming builds the 4K payload, which takes a few seconds
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            stub_request(base_url, "/_stats")
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.terminate()
+    raise RuntimeError("stub server did not start")
+
+
+def run_script(mode: str, fixtures: Path, env: dict, base_url: str, prime: bool = False) -> dict:
+    """Run one mode (or its prime) once and return raw measurements."""
+    script, build_args, build_prime = MODES[mode]
+    if prime:
+        build_args = build_prime
+    with tempfile.TemporaryDirectory() as out_dir:
+        cmd = [sys.executable, str(SCRIPTS[script]), *map(str, build_args(fixtures, Path(out_dir)))]
+        stub_request(base_url, "/_reset", "POST")
+        start = time.time()
+        proc = subprocess.Popen(cmd, cwd=out_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        stderr = proc.stderr.read()
+        proc.stderr.close()
+        _, status, usage = os.wait4(proc.pid, 0)
+        end = time.time()
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{mode} exited with {proc.returncode}: {stderr.decode(errors='replace').strip()}")
+        output_bytes = sum(p.stat().st_size for p in Path(out_dir).rglob("*") if p.is_file())
+
+    requests = stub_request(base_url, "/_stats")
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    first = min((r["start"] for r in requests), default=end)
+    last = max((r["end"] for r in requests), default=end)
+    return {
+        "seconds": end - start,
+        "startup": first - start,
+        "api": last - first,
+        "finish": end - last,
+        "requests": len(requests),
+        "upload_bytes": sum(r["bytes_in"] for r in requests),
+        "download_bytes": sum(r["bytes_out"] for r in requests),
+        "output_bytes": output_bytes,
+        "peak_rss_bytes": peak_rss,
+    }
+
+
+def benchmark(mode: str, fixtures: Path, env: dict, base_url: str, repeat: int) -> dict:
+    """Measure one mode, reporting the median of repeat runs."""
+    runs = []
+    for _ in range(repeat):
+        if MODES[mode][2]:
+            run_script(mode, fixtures, env, base_url, prime=True)
+        runs.append(run_script(mode, fixtures, env, base_url))
+    result = {"mode": mode, **runs[0]}
+    for key in ("seconds", "startup", "api", "finish"):
+        result[key] = statistics.median(r[key] for r in runs)
+    result["peak_rss_bytes"] = max(r["peak_rss_bytes"] for r in runs)
+    return result
+
+
+def format_bytes(value: float) -> str:
+    for unit in ("B", "K", "M", "G"):
+        if value < 1024 or unit == "G":
+            return f"{value:.0f}{unit}" if unit == "B" else f"{value:.1f}{unit}"
+        value /= 1024
+
+
+def compare(results: list, baseline: dict, threshold: float) -> list:
+    """Print per-mode changes and return the regressions.
+
+    Only the time spent in the script (startup and finish) is compared; the
+    api stage is dominated by the stub latency.
+    """
+    previous = {r["mode"]: r for r in baseline["results"]}
+    regressions = []
+    print(f"\nComparison with baseline ({baseline['meta']['timestamp']}):")
+    for r in results:
+        old = previous.get(r["mode"])
+        if not old:
+            continue
+        local = r["startup"] + r["finish"]
+        old_local = old["startup"] + old["finish"]
+        change = (local / old_local - 1) * 100
+        rss_change = (r["peak_rss_bytes"] / old["peak_rss_bytes"] - 1) * 100
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(r)
+        print(f"  {r['mode']:<20} script time {change:+6.1f}%  rss {rss_change:+6.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the image generation scripts against a local stub API")
+    parser.add_argument("--modes", help=f"Comma-separated modes (default: all of {', '.join(MODES)})")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub server latency per request in seconds")
+    parser.add_argument("--image-size", choices=["1K", "2K", "4K"], help="Force the size of returned images")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per measurement (median reported)")
+    parser.add_argument("--output", "-o", help="Write JSON results to file")
+    parser.add_argument("--baseline", "-b", help="Compare against a previous JSON results file")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    modes = args.modes.split(",") if args.modes else list(MODES)
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(unknown)}")
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    stub = start_stub(port, args.latency, args.image_size)
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            fixtures = Path(work_dir) / "fixtures"
+            fixtures.mkdir()
+            # Children inherit the parent's peak RSS on Linux, so keep the
+            # decoded fixture images out of this process
+            builder = multiprocessing.get_context("spawn").Process(target=make_fixtures, args=(fixtures,))
+            builder.start()
+            builder.join()
+            if builder.exitcode != 0:
+                raise RuntimeError("building the fixture images failed")
+            env = {
+                **os.environ,
+                "GOOGLE_GEMINI_BASE_URL": base_url,
+                "GEMINI_API_KEY": "stub",
+                "OPENAI_BASE_URL": f"{base_url}/v1",
+                "OPENAI_API_KEY": "stub",
+                # Keep the result cache of the cached mode out of the user's cache
+                "XDG_CACHE_HOME": str(Path(work_dir) / "cache"),
+            }
+
+            print(f"{'mode':<20} {'total s':>8} {'startup':>8} {'api':>8} {'finish':>8} {'reqs':>5} "
+                  f"{'upload':>8} {'download':>9} {'peak rss':>9}")
+            for mode in modes:
+                r = benchmark(mode, fixtures, env, base_url, args.repeat)
+                results.append(r)
+                print(f"{mode:<20} {r['seconds']:>8.2f} {r['startup']:>8.2f} {r['api']:>8.2f} "
+                      f"{r['finish']:>8.2f} {r['requests']:>5} {format_bytes(r['upload_bytes']):>8} "
+                      f"{format_bytes(r['download_bytes']):>9} {format_bytes(r['peak_rss_bytes']):>9}", flush=True)
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "latency": args.latency,
+            "image_size": args.image_size,
+        },
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "pillow>=10.0.0",
+# ]
+# ///
+"""
+Local stand-in for the Gemini and OpenAI image APIs.
+
+Serves the endpoints used by skills/nano-banana-pro and skills/gpt-image-1-5
+so both scripts can be run without API keys or network access:
+
+    POST /v1beta/models/{model}:generateContent    Gemini image generation and editing
+    POST /upload/v1beta/files                      Gemini Files API (resumable upload)
+    POST /v1/responses                             OpenAI Responses API, blocking or streamed
+    POST /v1/images/edits                          OpenAI Image API edits
+
+Each request sleeps for --latency seconds and returns a noise image (noise
+compresses like a photo, so payload sizes are realistic) at the size the
+request asked for, or at --image-size. Payloads are built once per size and
+format; --prewarm builds the common ones before the server starts listening. The timing and size of every request
+is recorded and served as JSON at GET /_stats (POST /_reset clears it).
+
+Usage:
+    uv run benchmarks/image-stub-server.py [--port 8765] [--latency 0.5] [--image-size 4K]
+
+    GOOGLE_GEMINI_BASE_URL=http://127.0.0.1:8765 GEMINI_API_KEY=stub \\
+        uv run skills/nano-banana-pro/scripts/generate_image.py --prompt "..." --filename out.png
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub \\
+        uv run skills/gpt-image-1-5/scripts/generate_image.py --prompt "..." --filename out.png
+"""
+
+import argparse
+import base64
+import functools
+import json
+import random
+import re
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+RESOLUTIONS = {"1K": 1024, "2K": 2048, "4K": 4096}
+
+PIL_FORMATS = {"png": "PNG", "jpeg": "JPEG", "webp": "WEBP"}
+
+GEMINI_PATH = re.compile(r"^/v1beta/models/([^/:]+):generateContent")
+
+
+@functools.lru_cache(maxsize=None)
+def make_image(width: int, height: int, fmt: str = "png", alpha: bool = False) -> bytes:
+    """Return an encoded noise image, built once per size and format."""
+    from PIL import Image
+
+    bands = [Image.effect_noise((width, height), 48) for _ in range(3)]
+    image = Image.merge("RGB", bands)
+    if alpha:
+        image.putalpha(Image.linear_gradient("L").resize((width, height)))
+    buf = BytesIO()
+    image.save(buf, PIL_FORMATS[fmt])
+    return buf.getvalue()
+
+
+@functools.lru_cache(maxsize=None)
+def make_b64_image(width: int, height: int, fmt: str = "png", alpha: bool = False) -> str:
+    return base64.b64encode(make_image(width, height, fmt, alpha)).decode()
+
+
+def prewarm(alpha: bool):
+    """Build the common payloads up front so the first requests are not slowed down."""
+    for side in RESOLUTIONS.values():
+        make_b64_image(side, side, alpha=alpha)
+    for fmt in PIL_FORMATS:
+        make_b64_image(1024, 1024, fmt, alpha and fmt != "jpeg")
+
+
+def openai_dimensions(size: str | None, override: str | None) -> tuple[int, int]:
+    """Map an OpenAI size parameter (e.g. 1536x1024) to pixel dimensions."""
+    if override:
+        return RESOLUTIONS[override], RESOLUTIONS[override]
+    if size and re.fullmatch(r"\d+x\d+", size):
+        width, height = size.split("x")
+        return int(width), int(height)
+    return 1024, 1024
+
+
+def parse_multipart(content_type: str, body: bytes) -> dict:
+    """Return the fields of a multipart/form-data body as {name: bytes}."""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        fields[name] = part.get_payload(decode=True)
+    return fields
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float, image_size: str | None, fail_rate: float, alpha: bool):
+        super().__init__(address, StubHandler)
+        self.latency = latency
+        self.image_size = image_size
+        self.fail_rate = fail_rate
+        self.alpha = alpha
+        self.stats = []
+        self.lock = threading.Lock()
+        self.uploads = 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StubServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/_stats":
+            with self.server.lock:
+                self.send_json(self.server.stats)
+        else:
+            self.send_json({"error": {"message": "not found"}}, 404)
+
+    def do_POST(self):
+        start = time.time()
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/_reset":
+            with self.server.lock:
+                self.server.stats.clear()
+            return self.send_json({})
+
+        sent = 0
+        status = 200
+        try:
+            if self.path.startswith("/upload/"):
+                sent = self.handle_upload(body)
+            elif self.server.fail_rate and random.random() < self.server.fail_rate:
+                time.sleep(self.server.latency)
+                status = 503
+                sent = self.send_json({"error": {"code": 503, "message": "stub overloaded",
+                                                  "status": "UNAVAILABLE"}}, status)
+            elif match := GEMINI_PATH.match(self.path):
+                sent = self.handle_gemini(match.group(1), json.loads(body))
+            elif self.path.endswith("/responses"):
+                sent = self.handle_responses(json.loads(body))
+            elif self.path.endswith("/images/edits"):
+                sent = self.handle_image_edit(body)
+            else:
+                status = 404
+                sent = self.send_json({"error": {"message": f"unknown endpoint {self.path}"}}, status)
+        finally:
+            with self.server.lock:
+                self.server.stats.append({
+                    "path": self.path.split("?")[0],
+                    "status": status,
+                    "start": start,
+                    "end": time.time(),
+                    "bytes_in": len(body),
+                    "bytes_out": sent,
+                })
+
+    def send_json(self, obj, status: int = 200, headers: dict | None = None) -> int:
+        data = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        return len(data)
+
+    # Gemini
+
+    def handle_upload(self, body: bytes) -> int:
+        command = self.headers.get("X-Goog-Upload-Command", "")
+        if "start" in command:
+            with self.server.lock:
+                self.server.uploads += 1
+                upload_id = self.server.uploads
+            host, port = self.server.server_address[:2]
+            url = f"http://{host}:{port}/upload/v1beta/files?upload_id={upload_id}"
+            return self.send_json({}, headers={"X-Goog-Upload-URL": url})
+        name = f"files/stub-{self.path.rsplit('=', 1)[-1]}"
+        host, port = self.server.server_address[:2]
+        return self.send_json({"file": {
+            "name": name,
+            "uri": f"http://{host}:{port}/v1beta/{name}",
+            "mimeType": self.headers.get("X-Goog-Upload-Header-Content-Type", "image/png"),
+            "sizeBytes": str(len(body)),
+            "state": "ACTIVE",
+        }}, headers={"X-Goog-Upload-Status": "final"})
+
+    def handle_gemini(self, model: str, request: dict) -> int:
+        image_config = request.get("generationConfig", {}).get("imageConfig", {})
+        side = RESOLUTIONS[self.server.image_size or image_config.get("imageSize", "1K")]
+        time.sleep(self.server.latency)
+        prompt_tokens = sum(len(part.get("text", "").split()) for content in request.get("contents", [])
+                            for part in content.get("parts", []))
+        return self.send_json({
+            "candidates": [{
+                "content": {"role": "model", "parts": [
+                    {"text": "Here is your image."},
+                    {"inlineData": {"mimeType": "image/png",
+                                    "data": make_b64_image(side, side, alpha=self.server.alpha)},
+                     "thoughtSignature": base64.b64encode(b"stub-signature").decode()},
+                ]},
+                "finishReason": "STOP",
+            }],
+            "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": 1290,
+                              "totalTokenCount": prompt_tokens + 1290},
+            "modelVersion": model,
+        })
+
+    # OpenAI
+
+    def handle_responses(self, request: dict) -> int:
+        tool = next((t for t in request.get("tools", []) if t.get("type") == "image_generation"), {})
+        width, height = openai_dimensions(tool.get("size"), self.server.image_size)
+        fmt = tool.get("output_format", "png")
+        transparent = self.server.alpha or tool.get("background") == "transparent"
+        item = {"id": "ig_stub", "type": "image_generation_call", "status": "completed",
+                "result": make_b64_image(width, height, fmt, transparent and fmt != "jpeg")}
+        response = {
+            "id": "resp_stub", "object": "response", "created_at": int(time.time()),
+            "model": request.get("model"), "status": "completed", "output": [item],
+            "tools": request.get("tools", []), "parallel_tool_calls": True, "tool_choice": "auto",
+            "usage": {"input_tokens": 20, "output_tokens": 1056, "total_tokens": 1076},
+        }
+        if not request.get("stream"):
+            time.sleep(self.server.latency)
+            return self.send_json(response)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        sent = 0
+        sequence = 0
+
+        def send_event(event: dict):
+            nonlocal sent, sequence
+            event["sequence_number"] = sequence
+            sequence += 1
+            data = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+            sent += len(data)
+
+        # Partial previews are spread evenly over the latency
+        partials = tool.get("partial_images", 0)
+        send_event({"type": "response.created", "response": {**response, "status": "in_progress", "output": []}})
+        for index in range(partials):
+            time.sleep(self.server.latency / (partials + 1))
+            send_event({"type": "response.image_generation_call.partial_image", "item_id": "ig_stub",
+                        "output_index": 0, "partial_image_index": index,
+                        "partial_image_b64": make_b64_image(width, height, fmt)})
+        time.sleep(self.server.latency / (partials + 1))
+        send_event({"type": "response.output_item.done", "output_index": 0, "item": item})
+        send_event({"type": "response.completed", "response": response})
+        self.wfile.write(b"0\r\n\r\n")
+        return sent
+
+    def handle_image_edit(self, body: bytes) -> int:
+        fields = parse_multipart(self.headers["Content-Type"], body)
+        width, height = openai_dimensions(fields.get("size", b"").decode() or None, self.server.image_size)
+        fmt = fields.get("output_format", b"png").decode()
+        n = int(fields.get("n", b"1"))
+        time.sleep(self.server.latency)
+        image = make_b64_image(width, height, fmt, self.server.alpha and fmt != "jpeg")
+        return self.send_json({
+            "created": int(time.time()),
+            "data": [{"b64_json": image} for _ in range(n)],
+            "usage": {"input_tokens": 300, "output_tokens": 1056 * n, "total_tokens": 300 + 1056 * n},
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gemini and OpenAI image APIs")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds each request takes (default: 0.5)")
+    parser.add_argument("--image-size", choices=list(RESOLUTIONS),
+                        help="Return images of this size instead of the requested one")
+    parser.add_argument("--fail-rate", type=float, default=0.0,
+                        help="Fraction of generation requests answered with HTTP 503 (default: 0)")
+    parser.add_argument("--alpha", action="store_true",
+                        help="Return images with an alpha channel to exercise conversion paths")
+    parser.add_argument("--prewarm", action="store_true",
+                        help="Build 1K, 2K and 4K payloads before accepting requests")
+    args = parser.parse_args()
+
+    if args.prewarm:
+        prewarm(args.alpha)
+
+    server = StubServer((args.host, args.port), args.latency, args.image_size, args.fail_rate, args.alpha)
+    print(f"Stub image API listening on http://{args.host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
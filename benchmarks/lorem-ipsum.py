@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# ///
+"""
+Throughput benchmark for the lorem-ipsum generator.
+
+Runs skills/lorem-ipsum/scripts/generate.py in a subprocess for each mode and
+output size, and records words/sec, bytes/sec, time-to-first-byte and peak RSS.
+
+Usage:
+    uv run benchmarks/lorem-ipsum.py [options]
+
+Options:
+    --sizes LIST        Comma-separated output sizes, e.g. 1K,1M,100M,1G (default: 1K,1M,16M)
+    --modes LIST        Comma-separated subset of modes (default: all)
+    --repeat N          Runs per measurement, the median is reported (default: 1)
+    --output FILE       Write JSON results to FILE
+    --baseline FILE     Compare against a previous JSON results file
+    --threshold PCT     Regression threshold in percent for --baseline (default: 10)
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+GENERATOR = Path(__file__).resolve().parents[1] / "skills" / "lorem-ipsum" / "scripts" / "generate.py"
+
+# Each mode maps a scale parameter n to generator arguments. Output size grows
+# roughly linearly with n; CALIBRATION_N is used to measure that ratio.
+MODES = {
+    "paragraphs": lambda n: ["--paragraphs", n],
+    "words": lambda n: ["--words", n],
+    "words-weighted": lambda n: ["--words", n, "--weighted"],
+    "headings": lambda n: ["--headings", 8, "--words", n],
+    "headings-bullets": lambda n: ["--headings", n, "--bullets", 8],
+    "mixed": lambda n: ["--mixed", n],
+    "format-text": lambda n: ["--paragraphs", n, "--format", "text"],
+    "format-html": lambda n: ["--paragraphs", n, "--format", "html"],
+    "format-jsonl": lambda n: ["--format", "jsonl", "--rows", n],
+    "format-csv": lambda n: ["--format", "csv", "--rows", n],
+    "format-sql": lambda n: ["--format", "sql", "--rows", n],
+    "characters": lambda n: ["--characters", n],
+    "tokens": lambda n: ["--tokens", n],
+}
+
+CALIBRATION_N = 1000
+
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+CHUNK_SIZE = 1 << 16
+
+
+def parse_size(value: str) -> int:
+    """Parse a size such as 512, 1K, 16M or 1G into bytes."""
+    value = value.strip().upper()
+    if value and value[-1] in UNITS:
+        return int(float(value[:-1]) * UNITS[value[-1]])
+    return int(value)
+
+
+def run_generator(args: list) -> dict:
+    """Run the generator once, streaming its stdout, and return raw measurements."""
+    cmd = [sys.executable, str(GENERATOR), "--seed", "0", *map(str, args)]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+
+    first_byte = None
+    total_bytes = 0
+    words = 0
+    in_word = False
+    while chunk := proc.stdout.read1(CHUNK_SIZE):
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        total_bytes += len(chunk)
+        # Count words across chunk boundaries without holding the output
+        words += len(chunk.split())
+        if in_word and not chunk[:1].isspace():
+            words -= 1
+        in_word = not chunk[-1:].isspace()
+    proc.stdout.close()
+
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise RuntimeError(f"generator exited with {proc.returncode}: {' '.join(cmd)}")
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {
+        "seconds": elapsed,
+        "bytes": total_bytes,
+        "words": words,
+        "ttfb": first_byte if first_byte is not None else elapsed,
+        "peak_rss_bytes": peak_rss,
+    }
+
+
+def calibrate(mode: str) -> float:
+    """Return output bytes per unit of the mode's scale parameter."""
+    result = run_generator(MODES[mode](CALIBRATION_N))
+    return result["bytes"] / CALIBRATION_N
+
+
+def benchmark(mode: str, target: int, bytes_per_n: float, repeat: int) -> dict:
+    """Measure one mode at one target size, reporting the median of repeat runs."""
+    n = max(1, math.ceil(target / bytes_per_n))
+    # Character and token modes take the size directly
+    if mode == "characters":
+        n = target
+    elif mode == "tokens":
+        n = max(1, target // 4)
+
+    runs = [run_generator(MODES[mode](n)) for _ in range(repeat)]
+    seconds = statistics.median(r["seconds"] for r in runs)
+    first = runs[0]
+    return {
+        "mode": mode,
+        "target_bytes": target,
+        "args": [str(a) for a in MODES[mode](n)],
+        "bytes": first["bytes"],
+        "words": first["words"],
+        "seconds": seconds,
+        "bytes_per_sec": first["bytes"] / seconds,
+        "words_per_sec": first["words"] / seconds,
+        "ttfb": statistics.median(r["ttfb"] for r in runs),
+        "peak_rss_bytes": max(r["peak_rss_bytes"] for r in runs),
+    }
+
+
+def format_bytes(value: float) -> str:
+    for unit in ("B", "K", "M", "G"):
+        if value < 1024 or unit == "G":
+            return f"{value:.0f}{unit}" if unit == "B" else f"{value:.1f}{unit}"
+        value /= 1024
+
+
+def compare(results: list, baseline: dict, threshold: float) -> list:
+    """Print per-measurement throughput changes and return the regressions."""
+    previous = {(r["mode"], r["target_bytes"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\nComparison with baseline ({baseline['meta']['timestamp']}):")
+    for r in results:
+        old = previous.get((r["mode"], r["target_bytes"]))
+        if not old:
+            continue
+        change = (r["bytes_per_sec"] / old["bytes_per_sec"] - 1) * 100
+        rss_change = (r["peak_rss_bytes"] / old["peak_rss_bytes"] - 1) * 100
+        flag = ""
+        if change < -threshold:
+            flag = "  REGRESSION"
+            regressions.append(r)
+        print(f"  {r['mode']:<18} {format_bytes(r['target_bytes']):>7}  "
+              f"throughput {change:+6.1f}%  rss {rss_change:+6.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lorem-ipsum generator")
+    parser.add_argument("--sizes", default="1K,1M,16M", help="Comma-separated output sizes (e.g. 1K,1M,1G)")
+    parser.add_argument("--modes", help=f"Comma-separated modes (default: all of {', '.join(MODES)})")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per measurement (median reported)")
+    parser.add_argument("--output", "-o", help="Write JSON results to file")
+    parser.add_argument("--baseline", "-b", help="Compare against a previous JSON results file")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    modes = args.modes.split(",") if args.modes else list(MODES)
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(unknown)}")
+    sizes = [parse_size(s) for s in args.sizes.split(",")]
+
+    results = []
+    print(f"{'mode':<18} {'size':>7} {'MB/s':>8} {'Mwords/s':>9} {'ttfb ms':>8} {'peak rss':>9}")
+    for mode in modes:
+        bytes_per_n = calibrate(mode)
+        for target in sizes:
+            r = benchmark(mode, target, bytes_per_n, args.repeat)
+            results.append(r)
+            print(f"{mode:<18} {format_bytes(r['bytes']):>7} {r['bytes_per_sec'] / 1e6:>8.2f} "
+                  f"{r['words_per_sec'] / 1e6:>9.2f} {r['ttfb'] * 1000:>8.1f} "
+                  f"{format_bytes(r['peak_rss_bytes']):>9}", flush=True)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
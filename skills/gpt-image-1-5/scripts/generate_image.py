@@ -2,7 +2,7 @@
 # /// script
 # requires-python = ">=3.10"
 # dependencies = [
-#     "openai>=1.50.0",
+#     "openai>=1.99.0",
 #     "pillow>=10.0.0",
 # ]
 # ///
@@ -18,15 +18,187 @@ Usage:
 
     # Edit image with mask (precise inpainting)
     uv run generate_image.py --prompt "what to add" --filename "output.png" --input-image "input.png" --mask "mask.png" [options]
+
+    # Several variants: output-1.png ... output-N.png
+    uv run generate_image.py --prompt "description" --filename "output.png" --n 4
+
+    # Generate with partial-image previews while the final image renders
+    uv run generate_image.py --prompt "description" --filename "output.png" --stream [--partial-images N]
+
+    # Edit many images concurrently (files and/or directories, or a JSONL batch file)
+    uv run generate_image.py --prompt "edit instructions" --input-image shots/ --out-dir edited/ [--mask "mask.png"]
+    uv run generate_image.py --batch edits.jsonl --out-dir edited/ [--concurrency N]
 """
 
 import argparse
 import base64
+import contextlib
+import contextvars
+import functools
+import json
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from io import BytesIO
 from pathlib import Path
 
+# Files picked up when a directory is passed to --input-image
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+
+# Output formats the API can return: Pillow format name and file extension
+OUTPUT_FORMATS = {"png": ("PNG", ".png"), "jpeg": ("JPEG", ".jpg"), "webp": ("WEBP", ".webp")}
+OUTPUT_EXTENSIONS = {".png": "png", ".jpg": "jpeg", ".jpeg": "jpeg", ".webp": "webp"}
+
+# Setting this appends one JSON record per API call to the named file
+TELEMETRY_ENV = "SKILLS_TELEMETRY"
+
+# The call whose HTTP requests are being made on this thread
+_current_call = contextvars.ContextVar("telemetry_call", default=None)
+
+
+class Telemetry:
+    """Per-call timings and sizes, appended as JSON lines to $SKILLS_TELEMETRY.
+
+    Process-wide stages (SDK import, client setup) are measured once and
+    repeated in every record the process writes.
+    """
+
+    def __init__(self, script: str):
+        self.script = script
+        self.path = os.environ.get(TELEMETRY_ENV)
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[f"{name}_s"] = round(time.perf_counter() - start, 6)
+
+    def call(self, operation: str, **fields) -> "TelemetryCall":
+        return TelemetryCall(self, operation, fields)
+
+    def httpx_hooks(self) -> dict:
+        """Return httpx event hooks that attribute each request to the current call."""
+        def on_request(request):
+            if call := _current_call.get():
+                call.on_request(request)
+
+        def on_response(response):
+            if call := _current_call.get():
+                call.on_response(response)
+
+        return {"request": [on_request], "response": [on_response]}
+
+    def write(self, record: dict):
+        if not self.path:
+            return
+        line = (json.dumps(record) + "\n").encode()
+        try:
+            # A single O_APPEND write keeps records whole across threads and processes
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            print(f"Warning: could not write telemetry to {self.path}: {e}", file=sys.stderr)
+
+
+class TelemetryCall:
+    """Timings, sizes, retries and usage of one API call, written when its with block exits."""
+
+    def __init__(self, telemetry: Telemetry, operation: str, fields: dict):
+        self.telemetry = telemetry
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.fields = {"operation": operation, **fields}
+        self.stages = {}
+        self.counts = {"http_requests": 0, "request_bytes": 0, "response_bytes": 0, "retries": 0}
+        self.usage = None
+        self.error = None
+        self.sent = None
+        self.responses = []
+
+    def __enter__(self):
+        self.token = _current_call.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_call.reset(self.token)
+        if isinstance(exc, Exception) and self.error is None:
+            self.error = str(exc)
+        self.telemetry.write(self.record())
+        return False
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            key = f"{name}_s"
+            self.stages[key] = round(self.stages.get(key, 0) + time.perf_counter() - start, 6)
+
+    def fail(self, error):
+        self.error = str(error)
+
+    def on_request(self, request):
+        # Each call is one endpoint, so any further request is an SDK retry
+        if self.counts["http_requests"]:
+            self.counts["retries"] += 1
+        self.counts["http_requests"] += 1
+        self.counts["request_bytes"] += int(request.headers.get("content-length") or 0)
+        self.sent = time.perf_counter()
+
+    def on_response(self, response):
+        # Response hooks run once the headers arrive, before the body is read
+        self.stages["first_byte_s"] = round(time.perf_counter() - self.sent, 6)
+        self.responses.append(response)
+
+    def record(self) -> dict:
+        self.counts["response_bytes"] = sum(r.num_bytes_downloaded for r in self.responses)
+        record = {
+            "time": datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec="milliseconds"),
+            "script": self.telemetry.script,
+            **self.fields,
+            "status": "error" if self.error else "ok",
+            **self.telemetry.stages,
+            **self.stages,
+            "total_s": round(time.perf_counter() - self.start, 6),
+            **self.counts,
+        }
+        if self.error:
+            record["error"] = self.error
+        if self.usage:
+            record["usage"] = self.usage
+        return record
+
+
+TELEMETRY = Telemetry("gpt-image-1-5")
+
+
+@contextlib.contextmanager
+def traced(stage: str):
+    """Add the time spent in the block to a stage of the current call, if there is one."""
+    call = _current_call.get()
+    if call is None:
+        yield
+        return
+    with call.stage(stage):
+        yield
+
+
+def record_usage(response):
+    """Attach the token usage of an API response to the current call, if there is one."""
+    call = _current_call.get()
+    usage = getattr(response, "usage", None)
+    if call and usage:
+        call.usage = usage.model_dump(mode="json", exclude_none=True)
+
 
 def get_api_key(provided_key: str | None) -> str | None:
     """Get API key from argument first, then environment."""
@@ -35,13 +207,11 @@ def get_api_key(provided_key: str | None) -> str | None:
     return os.environ.get("OPENAI_API_KEY")
 
 
-def create_full_transparent_mask(image_path: str) -> bytes:
-    """Create a fully transparent PNG mask matching the input image dimensions."""
+@functools.lru_cache(maxsize=None)
+def transparent_mask(width: int, height: int) -> bytes:
+    """Return a fully transparent PNG mask of the given size, built once per size."""
     from PIL import Image
 
-    with Image.open(image_path) as img:
-        width, height = img.size
-
     # Create fully transparent image (all pixels have alpha=0)
     mask = Image.new("RGBA", (width, height), (0, 0, 0, 0))
 
@@ -50,16 +220,54 @@ def create_full_transparent_mask(image_path: str) -> bytes:
     return buf.getvalue()
 
 
-def generate_image_responses_api(
-    client,
-    prompt: str,
-    quality: str = "medium",
-    size: str = "1024x1024",
-    background: str = "auto",
-) -> bytes:
-    """Generate image using the Responses API with gpt-image-1.5."""
+def create_full_transparent_mask(image_path: str) -> bytes:
+    """Create a fully transparent PNG mask matching the input image dimensions."""
+    from PIL import Image
+
+    # Only the header is read to get the size
+    with Image.open(image_path) as img:
+        width, height = img.size
+
+    return transparent_mask(width, height)
+
+
+@functools.lru_cache(maxsize=None)
+def read_mask(mask_path: str) -> bytes:
+    """Read a mask file once, however many edits share it."""
+    return Path(mask_path).read_bytes()
 
-    # Build tool configuration for image generation
+
+def output_format_for(output_path: Path) -> str:
+    """Pick the output format from the file extension, defaulting to PNG."""
+    return OUTPUT_EXTENSIONS.get(output_path.suffix.lower(), "png")
+
+
+def sniff_format(image_bytes: bytes) -> str | None:
+    """Return the output format of encoded image bytes from their signature."""
+    if image_bytes[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    if image_bytes[:3] == b"\xff\xd8\xff":
+        return "jpeg"
+    if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def output_options(output_format: str, output_compression: int | None) -> dict:
+    """Return the output format parameters shared by the image tool and the Image API."""
+    options = {}
+    # PNG is the API default
+    if output_format != "png":
+        options["output_format"] = output_format
+    # The API only accepts a compression level for jpeg and webp
+    if output_compression is not None and output_format != "png":
+        options["output_compression"] = output_compression
+    return options
+
+
+def build_tool_config(quality: str, size: str, background: str, output_format: str = "png",
+                      output_compression: int | None = None) -> dict:
+    """Build the image_generation tool configuration for the Responses API."""
     tool_config = {
         "type": "image_generation",
         "quality": quality,
@@ -73,53 +281,264 @@ def generate_image_responses_api(
     if background != "auto":
         tool_config["background"] = background
 
+    tool_config.update(output_options(output_format, output_compression))
+    return tool_config
+
+
+def generate_image_responses_api(
+    client,
+    prompt: str,
+    quality: str = "medium",
+    size: str = "1024x1024",
+    background: str = "auto",
+    output_format: str = "png",
+    output_compression: int | None = None,
+) -> bytes:
+    """Generate image using the Responses API with gpt-image-1.5."""
+
     # Call the Responses API
-    response = client.responses.create(
-        model="gpt-4.1",  # Model that orchestrates the image generation tool
-        input=prompt,
-        tools=[tool_config],
-    )
+    with traced("request"):
+        response = client.responses.create(
+            model="gpt-4.1",  # Model that orchestrates the image generation tool
+            input=prompt,
+            tools=[build_tool_config(quality, size, background, output_format, output_compression)],
+        )
+    record_usage(response)
 
     # Extract the generated image
     for output in response.output:
         if output.type == "image_generation_call":
-            return base64.b64decode(output.result)
+            with traced("decode"):
+                return base64.b64decode(output.result)
 
     raise RuntimeError("No image was generated in the response")
 
 
+def stream_image_responses_api(
+    client,
+    prompt: str,
+    quality: str = "medium",
+    size: str = "1024x1024",
+    background: str = "auto",
+    partial_images: int = 2,
+    on_partial=None,
+    output_format: str = "png",
+    output_compression: int | None = None,
+) -> bytes:
+    """Generate image using streaming Responses API events.
+
+    on_partial(index, image_bytes) is called for each partial image as it
+    arrives (index starts at 1); the final image is returned.
+    """
+    tool_config = build_tool_config(quality, size, background, output_format, output_compression)
+    tool_config["partial_images"] = partial_images
+
+    result = None
+    # The request stage covers the whole stream, including saving partial previews
+    with traced("request"):
+        stream = client.responses.create(
+            model="gpt-4.1",  # Model that orchestrates the image generation tool
+            input=prompt,
+            tools=[tool_config],
+            stream=True,
+        )
+
+        for event in stream:
+            if event.type == "response.image_generation_call.partial_image":
+                if on_partial:
+                    on_partial(event.partial_image_index + 1, base64.b64decode(event.partial_image_b64))
+            elif event.type == "response.output_item.done":
+                if event.item.type == "image_generation_call" and event.item.result:
+                    result = event.item.result
+            elif event.type == "response.completed":
+                record_usage(event.response)
+                if result is None:
+                    for output in event.response.output:
+                        if output.type == "image_generation_call" and output.result:
+                            result = output.result
+            elif event.type in ("response.failed", "error"):
+                error = getattr(event, "message", None) or getattr(getattr(event, "response", None), "error", None)
+                raise RuntimeError(f"Image generation failed: {error}")
+
+    if result is None:
+        raise RuntimeError("No image was generated in the response")
+    with traced("decode"):
+        return base64.b64decode(result)
+
+
+def partial_image_path(output_path: Path, index: int) -> Path:
+    """Return the path of a partial preview, e.g. sunset.partial-1.png."""
+    return output_path.with_name(f"{output_path.stem}.partial-{index}{output_path.suffix}")
+
+
+def save_image(image_bytes: bytes, output_path: Path, background: str, output_format: str = "png",
+               output_compression: int | None = None):
+    """Save a returned image in the output format.
+
+    Bytes the API already encoded in that format are written as-is; anything
+    else is converted locally, keeping alpha for PNG/WebP or transparent output.
+    """
+    if sniff_format(image_bytes) == output_format:
+        output_path.write_bytes(image_bytes)
+        return
+
+    from PIL import Image
+
+    image = Image.open(BytesIO(image_bytes))
+    pil_format = OUTPUT_FORMATS[output_format][0]
+    options = {} if output_compression is None or output_format == "png" else {"quality": output_compression}
+
+    # Handle format conversion if needed
+    if output_format != "jpeg" and (background == "transparent" or output_format == "png"):
+        # Keep RGBA for transparent or PNG output
+        if image.mode != "RGBA":
+            image = image.convert("RGBA")
+        image.save(str(output_path), pil_format, **options)
+    else:
+        # Convert to RGB for non-transparent output
+        if image.mode == "RGBA":
+            rgb_image = Image.new("RGB", image.size, (255, 255, 255))
+            rgb_image.paste(image, mask=image.split()[3])
+            rgb_image.save(str(output_path), pil_format, **options)
+        elif image.mode == "RGB":
+            image.save(str(output_path), pil_format, **options)
+        else:
+            image.convert("RGB").save(str(output_path), pil_format, **options)
+
+
+def variant_path(output_path: Path, index: int, n: int) -> Path:
+    """Return the path of one of n variants, e.g. sunset-2.png (the path itself when n is 1)."""
+    if n == 1:
+        return output_path
+    return output_path.with_name(f"{output_path.stem}-{index}{output_path.suffix}")
+
+
 def edit_image_with_mask(
     client,
     prompt: str,
     image_path: str,
     mask_path: str | None,
     size: str = "1024x1024",
+    output_format: str = "png",
+    output_compression: int | None = None,
 ) -> bytes:
     """Edit image using the Image API with mask support."""
-    from PIL import Image
+    return edit_image_variants(client, prompt, image_path, mask_path, size, output_format, output_compression)[0]
 
+
+def edit_image_variants(
+    client,
+    prompt: str,
+    image_path: str,
+    mask_path: str | None,
+    size: str = "1024x1024",
+    output_format: str = "png",
+    output_compression: int | None = None,
+    n: int = 1,
+) -> list[bytes]:
+    """Edit image using the Image API, returning n variants from a single request."""
     # If no mask provided, create a fully transparent one (edit entire image)
     if mask_path:
-        mask_file = open(mask_path, "rb")
+        mask_bytes = read_mask(mask_path)
     else:
         mask_bytes = create_full_transparent_mask(image_path)
-        mask_file = BytesIO(mask_bytes)
-        mask_file.name = "mask.png"
 
-    try:
+    # Files are sent as (name, bytes) so no handles are left open
+    with traced("request"):
         result = client.images.edit(
             model="gpt-image-1.5",
-            image=open(image_path, "rb"),
-            mask=mask_file,
+            image=(Path(image_path).name, Path(image_path).read_bytes()),
+            mask=("mask.png", mask_bytes),
             prompt=prompt,
             size=size if size != "auto" else "1024x1024",
+            n=n,
+            **output_options(output_format, output_compression),
         )
+    record_usage(result)
+
+    with traced("decode"):
+        return [base64.b64decode(image.b64_json) for image in result.data]
+
+
+def expand_input_images(paths: list[str]) -> list[Path]:
+    """Expand directories among the input paths to the image files they contain."""
+    images = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            images.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES))
+        else:
+            images.append(path)
+    return images
 
-        image_base64 = result.data[0].b64_json
-        return base64.b64decode(image_base64)
+
+def read_edit_batch(path: str, default_prompt: str | None, default_mask: str | None) -> list[dict]:
+    """Read edit jobs from a JSONL file ("-" for stdin).
+
+    Each line is {"input_image": ..., "prompt": optional, "mask": optional,
+    "filename": optional}; prompt and mask default to --prompt and --mask.
+    """
+    f = sys.stdin if path == "-" else open(path)
+    jobs = []
+    try:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            if not isinstance(job, dict) or not job.get("input_image"):
+                raise ValueError(f"line {line_number}: each entry needs an input_image")
+            job.setdefault("prompt", default_prompt)
+            job.setdefault("mask", default_mask)
+            if not job["prompt"]:
+                raise ValueError(f"line {line_number}: no prompt (set one per line or pass --prompt)")
+            jobs.append(job)
     finally:
-        if mask_path:
-            mask_file.close()
+        if f is not sys.stdin:
+            f.close()
+    return jobs
+
+
+def run_edit_batch(client, jobs: list[dict], out_dir: Path, size: str, background: str,
+                   concurrency: int, output_format: str | None = None,
+                   output_compression: int | None = None, n: int = 1) -> int:
+    """Run edit jobs concurrently on one client, saving each result as it completes.
+
+    Without an explicit output_format, each job's format follows its filename
+    (PNG for generated names). Returns the number of failed jobs.
+    """
+
+    def run(job: dict) -> list[Path]:
+        if job.get("filename"):
+            output_path = Path(job["filename"])
+        else:
+            extension = OUTPUT_FORMATS[output_format or "png"][1]
+            output_path = out_dir / f"{Path(job['input_image']).stem}{extension}"
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        job_format = output_format or output_format_for(output_path)
+        with TELEMETRY.call("edit", model="gpt-image-1.5", input_image=job["input_image"], n=n) as call:
+            images = edit_image_variants(client, job["prompt"], job["input_image"], job["mask"], size,
+                                         job_format, output_compression, n)
+            paths = []
+            with call.stage("write"):
+                for index, image_bytes in enumerate(images, 1):
+                    path = variant_path(output_path, index, n)
+                    save_image(image_bytes, path, background, job_format, output_compression)
+                    paths.append(path)
+        return paths
+
+    start = time.perf_counter()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(run, job): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                for output_path in future.result():
+                    print(f"Image saved: {output_path.resolve()}", flush=True)
+            except Exception as e:
+                failed += 1
+                print(f"Error: {futures[future]['input_image']}: {e}", file=sys.stderr, flush=True)
+
+    print(f"\n{len(jobs) - failed} succeeded, {failed} failed in {time.perf_counter() - start:.1f}s")
+    return failed
 
 
 def main():
@@ -128,17 +547,30 @@ def main():
     )
     parser.add_argument(
         "--prompt", "-p",
-        required=True,
         help="Image description or editing instructions"
     )
     parser.add_argument(
         "--filename", "-f",
-        required=True,
         help="Output filename (e.g., output.png)"
     )
     parser.add_argument(
         "--input-image", "-i",
-        help="Optional input image path for editing"
+        nargs="+",
+        help="Optional input image path for editing; several paths or directories edit each image"
+    )
+    parser.add_argument(
+        "--batch",
+        help="JSONL file of edits, one {\"input_image\", \"prompt\"?, \"mask\"?, \"filename\"?} per line"
+    )
+    parser.add_argument(
+        "--out-dir", "-o",
+        help="Output directory when editing several images (files are named after the inputs)"
+    )
+    parser.add_argument(
+        "--concurrency", "-c",
+        type=int,
+        default=4,
+        help="Edits in flight when editing several images (default: 4)"
     )
     parser.add_argument(
         "--mask", "-m",
@@ -162,6 +594,39 @@ def main():
         default="auto",
         help="Background type for generation (default: auto)"
     )
+    parser.add_argument(
+        "--n", "-n",
+        type=int,
+        choices=range(1, 11),
+        default=1,
+        metavar="1-10",
+        help="Number of variants, saved as name-1.png ... name-N.png (default: 1)"
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=list(OUTPUT_FORMATS),
+        help="Format the API returns and the file is saved in (default: from the filename extension, PNG if unknown)"
+    )
+    parser.add_argument(
+        "--output-compression",
+        type=int,
+        choices=range(101),
+        metavar="0-100",
+        help="Compression level for jpeg/webp output, 0-100 (default: API default)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream generation and save partial previews (name.partial-N.png) as they arrive"
+    )
+    parser.add_argument(
+        "--partial-images",
+        type=int,
+        choices=range(4),
+        default=2,
+        metavar="0-3",
+        help="Number of partial previews to request with --stream (default: 2)"
+    )
     parser.add_argument(
         "--api-key", "-k",
         help="OpenAI API key (overrides OPENAI_API_KEY env var)"
@@ -169,6 +634,25 @@ def main():
 
     args = parser.parse_args()
 
+    input_images = expand_input_images(args.input_image or [])
+    if args.input_image and not input_images:
+        parser.error(f"no images found in {', '.join(args.input_image)}")
+    multiple = bool(args.batch) or len(input_images) > 1
+    if multiple:
+        if not args.out_dir:
+            parser.error("--out-dir is required when editing several images")
+        if not args.batch and not args.prompt:
+            parser.error("--prompt is required")
+    elif not (args.prompt and args.filename):
+        parser.error("--prompt and --filename are required")
+    requested_format = args.output_format or (args.filename and output_format_for(Path(args.filename)))
+    if args.background == "transparent" and requested_format == "jpeg":
+        parser.error("--background transparent needs png or webp output")
+    if args.output_compression is not None and requested_format == "png":
+        parser.error("--output-compression only applies to jpeg or webp output")
+    if args.stream and (args.input_image or args.batch):
+        parser.error("--stream is only supported for generation, not editing")
+
     # Get API key
     api_key = get_api_key(args.api_key)
     if not api_key:
@@ -179,20 +663,44 @@ def main():
         sys.exit(1)
 
     # Import here after checking API key to avoid slow import on error
-    from openai import OpenAI
+    with TELEMETRY.stage("import"):
+        from openai import DefaultHttpxClient, OpenAI
 
     # Initialise client
-    client = OpenAI(api_key=api_key)
+    with TELEMETRY.stage("client_init"):
+        http_client = DefaultHttpxClient(event_hooks=TELEMETRY.httpx_hooks()) if TELEMETRY.path else None
+        client = OpenAI(api_key=api_key, http_client=http_client)
+
+    if multiple:
+        try:
+            if args.batch:
+                jobs = read_edit_batch(args.batch, args.prompt, args.mask)
+            else:
+                jobs = [{"input_image": str(path), "prompt": args.prompt, "mask": args.mask} for path in input_images]
+        except Exception as e:
+            print(f"Error reading batch file: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Editing {len(jobs)} images using Image API (concurrency {args.concurrency})...")
+        if run_edit_batch(client, jobs, Path(args.out_dir), args.size, args.background, args.concurrency,
+                          args.output_format, args.output_compression, args.n):
+            sys.exit(1)
+        return
 
     # Set up output path
     output_path = Path(args.filename)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
+    output_format = args.output_format or output_format_for(output_path)
+
+    # Single image output keeps the blank line before the saved path
+    saved_prefix = "\n" if args.n == 1 else ""
+
     # Determine operation mode
-    if args.input_image:
+    if input_images:
+        input_image = str(input_images[0])
         # Validate input image exists
-        if not Path(args.input_image).exists():
-            print(f"Error: Input image not found: {args.input_image}", file=sys.stderr)
+        if not Path(input_image).exists():
+            print(f"Error: Input image not found: {input_image}", file=sys.stderr)
             sys.exit(1)
 
         if args.mask:
@@ -202,81 +710,105 @@ def main():
                 sys.exit(1)
 
             print(f"Editing image with mask using Image API...")
-            print(f"  Input: {args.input_image}")
+            print(f"  Input: {input_image}")
             print(f"  Mask: {args.mask}")
-            print(f"  Size: {args.size}")
-
-            try:
-                image_bytes = edit_image_with_mask(
-                    client,
-                    args.prompt,
-                    args.input_image,
-                    args.mask,
-                    args.size,
-                )
-            except Exception as e:
-                print(f"Error editing image with mask: {e}", file=sys.stderr)
-                sys.exit(1)
+            error_message = "Error editing image with mask"
         else:
             # Edit without mask - use Image API with auto-generated full mask
             print(f"Editing image using Image API (full image edit)...")
-            print(f"  Input: {args.input_image}")
-            print(f"  Size: {args.size}")
+            print(f"  Input: {input_image}")
+            error_message = "Error editing image"
+        print(f"  Size: {args.size}")
 
+        # The Image API returns all variants from one request
+        with TELEMETRY.call("edit", model="gpt-image-1.5", masked=bool(args.mask), n=args.n) as call:
             try:
-                image_bytes = edit_image_with_mask(
+                images = edit_image_variants(
                     client,
                     args.prompt,
-                    args.input_image,
-                    None,  # No mask - will create full transparent mask
+                    input_image,
+                    args.mask,  # None will create a full transparent mask
                     args.size,
+                    output_format,
+                    args.output_compression,
+                    args.n,
                 )
             except Exception as e:
-                print(f"Error editing image: {e}", file=sys.stderr)
+                call.fail(e)
+                print(f"{error_message}: {e}", file=sys.stderr)
                 sys.exit(1)
-    else:
-        # Generation mode - use Responses API
-        print(f"Generating image using Responses API...")
-        print(f"  Quality: {args.quality}")
-        print(f"  Size: {args.size}")
-        print(f"  Background: {args.background}")
 
-        try:
-            image_bytes = generate_image_responses_api(
+            for index, image_bytes in enumerate(images, 1):
+                path = variant_path(output_path, index, args.n)
+                with call.stage("write"):
+                    save_image(image_bytes, path, args.background, output_format, args.output_compression)
+                print(f"{saved_prefix}Image saved: {path.resolve()}", flush=True)
+        return
+
+    # Generation mode - use Responses API
+    print(f"Generating image using Responses API...")
+    print(f"  Quality: {args.quality}")
+    print(f"  Size: {args.size}")
+    print(f"  Background: {args.background}")
+    if args.n > 1:
+        print(f"  Variants: {args.n}")
+
+    start = time.perf_counter()
+
+    def generate_variant(path: Path) -> Path:
+        with TELEMETRY.call("generate", model="gpt-image-1.5", stream=args.stream) as call:
+            image_bytes = request_variant(path)
+            # Save the image
+            with call.stage("write"):
+                save_image(image_bytes, path, args.background, output_format, args.output_compression)
+        return path
+
+    def request_variant(path: Path) -> bytes:
+        if args.stream:
+            def save_partial(index: int, partial_bytes: bytes):
+                partial_path = partial_image_path(path, index)
+                # Previews are written exactly as received, without decoding
+                partial_path.write_bytes(partial_bytes)
+                print(f"Partial image {index} saved: {partial_path.resolve()} "
+                      f"({time.perf_counter() - start:.1f}s)", flush=True)
+
+            image_bytes = stream_image_responses_api(
                 client,
                 args.prompt,
                 args.quality,
                 args.size,
                 args.background,
+                args.partial_images,
+                save_partial,
+                output_format,
+                args.output_compression,
             )
-        except Exception as e:
-            print(f"Error generating image: {e}", file=sys.stderr)
-            sys.exit(1)
-
-    # Save the image
-    from PIL import Image
-
-    image = Image.open(BytesIO(image_bytes))
-
-    # Handle format conversion if needed
-    if args.background == "transparent" or output_path.suffix.lower() == ".png":
-        # Keep RGBA for transparent or PNG output
-        if image.mode != "RGBA":
-            image = image.convert("RGBA")
-        image.save(str(output_path), "PNG")
-    else:
-        # Convert to RGB for non-transparent output
-        if image.mode == "RGBA":
-            rgb_image = Image.new("RGB", image.size, (255, 255, 255))
-            rgb_image.paste(image, mask=image.split()[3])
-            rgb_image.save(str(output_path), "PNG")
-        elif image.mode == "RGB":
-            image.save(str(output_path), "PNG")
-        else:
-            image.convert("RGB").save(str(output_path), "PNG")
+            print(f"Final image received: {path.name} ({time.perf_counter() - start:.1f}s)", flush=True)
+            return image_bytes
+        return generate_image_responses_api(
+            client,
+            args.prompt,
+            args.quality,
+            args.size,
+            args.background,
+            output_format,
+            args.output_compression,
+        )
 
-    full_path = output_path.resolve()
-    print(f"\nImage saved: {full_path}")
+    # The image generation tool makes one image per response, so variants
+    # are separate requests running in parallel on the shared client
+    paths = [variant_path(output_path, index, args.n) for index in range(1, args.n + 1)]
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.n) as executor:
+        futures = [executor.submit(generate_variant, path) for path in paths]
+        for future in as_completed(futures):
+            try:
+                print(f"{saved_prefix}Image saved: {future.result().resolve()}", flush=True)
+            except Exception as e:
+                failed += 1
+                print(f"Error generating image: {e}", file=sys.stderr, flush=True)
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -20,10 +20,22 @@ Options:
     --numbered          Use numbered lists instead of bullets
     --mixed N           Generate realistic document with N sections, varied content types
     --output FILE       Write to file instead of stdout
-    --format FORMAT     Output format: text, markdown, html (default: markdown)
+    --format FORMAT     Output format: text, markdown, html, jsonl, csv, sql (default: markdown)
+    --rows N            Number of records for jsonl/csv/sql formats (default: 10)
+    --fields SCHEMA     Record fields for jsonl/csv/sql, e.g. "id:id,title:words:3-8,body:sentences:2"
+    --table NAME        Table name for sql format (default: lorem)
+    --weighted          Sample words by a Zipf-like frequency model instead of uniformly
+    --seed N            Seed the random generator for reproducible output
+    --batch FILE        Generate every document described in a JSONL manifest ("-" for stdin)
+    --out-dir DIR       Directory for batch output files (required with --batch)
+    --jobs N            Worker processes for batch mode (default: CPU count)
 """
 
 import argparse
+import functools
+import json
+import multiprocessing
+import os
 import random
 import sys
 
@@ -44,7 +56,7 @@ WORDS = [
     "fugit", "consequuntur", "magni", "dolores", "eos", "ratione", "sequi",
     "nesciunt", "neque", "porro", "quisquam", "nihil", "numquam", "eius", "modi",
     "tempora", "corporis", "suscipit", "laboriosam", "aliquid", "commodi",
-    "consequatur", "autem", "vel", "eum", "iure", "quam", "nihil", "molestiae",
+    "consequatur", "autem", "vel", "eum", "iure", "quam", "molestiae",
     "illum", "quo", "maxime", "placeat", "facere", "possimus", "assumenda",
     "repellendus", "temporibus", "quibusdam", "officiis", "debitis", "rerum",
     "necessitatibus", "saepe", "eveniet", "voluptates", "repudiandae", "recusandae",
@@ -53,16 +65,104 @@ WORDS = [
     "repellat"
 ]
 
+# File extension used for batch documents without an explicit filename
+EXTENSIONS = {
+    "text": ".txt", "markdown": ".md", "html": ".html",
+    "jsonl": ".jsonl", "csv": ".csv", "sql": ".sql",
+}
+
+# Formats that produce tabular records instead of prose
+RECORD_FORMATS = {"jsonl", "csv", "sql"}
+
+# Default record schema for jsonl/csv/sql output
+DEFAULT_FIELDS = "id:id,title:words:3-8,body:sentences:1-3"
+
+# How paragraphs fields join their paragraphs inside a quoted value: JSON
+# needs an escaped newline, while CSV and SQL strings can hold a real one
+PARAGRAPH_SEPARATORS = {"jsonl": "\\n\\n", "csv": "\n\n", "sql": "\n\n"}
+
+# Records per write (and per INSERT statement for sql)
+RECORD_BATCH_SIZE = 1000
+
+# Field types for record schemas, with their default length ranges
+FIELD_DEFAULTS = {
+    "id": (0, 0),           # Sequential integer starting at 1
+    "int": (0, 1000),       # Random integer in range
+    "words": (3, 8),        # Number of words
+    "sentences": (1, 3),    # Number of sentences
+    "paragraphs": (1, 1),   # Number of paragraphs (joined with an escaped newline)
+}
+
 # Canonical opening
 OPENING = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore et dolore magna aliqua."
 
 
+def build_alias_table(weights):
+    """Build Walker/Vose alias tables (probability, alias index) for O(1) weighted sampling."""
+    n = len(weights)
+    total = sum(weights)
+    scaled = [w * n / total for w in weights]
+    prob = [1.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    return prob, alias
+
+
+@functools.lru_cache(maxsize=None)
+def weighted_word_table():
+    """Return (words, probabilities, alias words) for the frequency-weighted model.
+
+    Real prose follows Zipf's law, with short function words far more common
+    than long ones. Words are ranked by length (ties keep vocabulary order) and
+    weighted with a Zipf-Mandelbrot curve, 1 / (rank + 2.7), which gives the
+    most common word a ~7% share as in natural language. The tables are built
+    once per process and cached.
+    """
+    ranked = sorted(WORDS, key=len)
+    prob, alias = build_alias_table([1.0 / (rank + 2.7) for rank in range(1, len(ranked) + 1)])
+    return ranked, prob, [ranked[i] for i in alias]
+
+
+def sample_weighted_words(count):
+    """Draw count words from the weighted model using one random number per word."""
+    words, prob, alias_words = weighted_word_table()
+    n = len(words)
+    rnd = random.random
+    result = []
+    for _ in range(count):
+        u = rnd() * n
+        i = int(u)
+        result.append(words[i] if u - i < prob[i] else alias_words[i])
+    return result
+
+
+# Active word model, switched by set_word_model()
+_weighted = False
+
+
+def set_word_model(weighted):
+    """Select the uniform (default) or frequency-weighted word model."""
+    global _weighted
+    _weighted = bool(weighted)
+
+
 def generate_word():
+    if _weighted:
+        return sample_weighted_words(1)[0]
     return random.choice(WORDS)
 
 
 def generate_words(count):
-    return [generate_word() for _ in range(count)]
+    if _weighted:
+        return sample_weighted_words(count)
+    return random.choices(WORDS, k=count)
 
 
 def generate_sentence(min_words=6, max_words=15):
@@ -95,6 +195,99 @@ def generate_bullet_item():
     return " ".join(words)
 
 
+def parse_range(value, default):
+    """Parse "N" or "MIN-MAX" into a (min, max) tuple."""
+    if not value:
+        return default
+    low, _, high = value.partition("-")
+    low = int(low)
+    high = int(high) if high else low
+    if low < 0 or high < low:
+        raise ValueError(f"invalid range: {value}")
+    return low, high
+
+
+def parse_fields(schema):
+    """Parse a field schema like "id:id,title:words:3-8" into (name, type, range) tuples."""
+    fields = []
+    for item in schema.split(","):
+        name, _, rest = item.strip().partition(":")
+        kind, _, length = rest.partition(":")
+        kind = kind or "words"
+        if not name.isidentifier():
+            raise ValueError(f"invalid field name: {name!r}")
+        if kind not in FIELD_DEFAULTS:
+            raise ValueError(f"unknown field type {kind!r} (choose from {', '.join(FIELD_DEFAULTS)})")
+        fields.append((name, kind, parse_range(length, FIELD_DEFAULTS[kind])))
+    return fields
+
+
+def generate_field_value(kind, length, separator="\n\n"):
+    """Generate a single record value of the given field type, joining paragraphs with separator."""
+    low, high = length
+    if kind == "int":
+        return random.randint(low, high)
+    count = random.randint(low, high)
+    if kind == "words":
+        return " ".join(generate_words(count))
+    if kind == "sentences":
+        return " ".join(generate_sentence() for _ in range(count))
+    return separator.join(generate_paragraph(random.randint(3, 6)) for _ in range(count))
+
+
+def record_fields(args):
+    """Return the parsed field schema for record output, after checking the table name."""
+    fields = parse_fields(args.fields or DEFAULT_FIELDS)
+    if not args.table.isidentifier():
+        raise ValueError(f"invalid table name: {args.table!r}")
+    return fields
+
+
+def write_records(args, out):
+    """Stream args.rows records in jsonl, csv or sql format to a text stream.
+
+    Each row is rendered through a preformatted %-template, and rows are
+    written in batches so memory use stays constant regardless of row count.
+    Lorem text never contains quotes or backslashes, so text values can be
+    dropped into quoted template slots without escaping; only the newlines
+    between paragraphs differ per format (see PARAGRAPH_SEPARATORS).
+    """
+    fields = record_fields(args)
+    names = [name for name, _, _ in fields]
+    separator = PARAGRAPH_SEPARATORS[args.format]
+
+    if args.format == "jsonl":
+        slots = [f'"{name}": ' + ("%d" if kind in ("id", "int") else '"%s"') for name, kind, _ in fields]
+        template = "{" + ", ".join(slots) + "}\n"
+    elif args.format == "csv":
+        out.write(",".join(names) + "\n")
+        slots = ["%d" if kind in ("id", "int") else '"%s"' for _, kind, _ in fields]
+        template = ",".join(slots) + "\n"
+    else:  # sql
+        slots = ["%d" if kind in ("id", "int") else "'%s'" for _, kind, _ in fields]
+        template = "(" + ", ".join(slots) + ")"
+        # Quote identifiers so names like "order" or "group" stay valid SQL
+        columns = ", ".join(f'"{name}"' for name in names)
+        statement = f'INSERT INTO "{args.table}" ({columns}) VALUES\n'
+
+    row_id = 0
+    remaining = args.rows
+    while remaining > 0:
+        batch_size = min(RECORD_BATCH_SIZE, remaining)
+        rows = []
+        for _ in range(batch_size):
+            row_id += 1
+            rows.append(template % tuple(
+                row_id if kind == "id" else generate_field_value(kind, length, separator)
+                for _, kind, length in fields
+            ))
+        if args.format == "sql":
+            out.write(statement + ",\n".join(rows) + ";\n")
+        else:
+            out.write("".join(rows))
+        remaining -= batch_size
+
+
 def format_output(content, fmt, is_heading=False, heading_level=2):
     if fmt == "html":
         if is_heading:
@@ -234,7 +427,7 @@ def generate_mixed_section(fmt, use_opening=False):
     return lines
 
 
-def main():
+def build_parser():
     parser = argparse.ArgumentParser(description="Generate lorem ipsum text")
     parser.add_argument("--paragraphs", type=int, default=3, help="Number of paragraphs")
     parser.add_argument("--sentences", type=int, default=5, help="Sentences per paragraph")
@@ -247,10 +440,21 @@ def main():
     parser.add_argument("--numbered", action="store_true", help="Use numbered lists")
     parser.add_argument("--mixed", type=int, help="Generate realistic document with N sections")
     parser.add_argument("--output", "-o", help="Output file path")
-    parser.add_argument("--format", "-f", choices=["text", "markdown", "html"], default="markdown")
+    parser.add_argument("--format", "-f", choices=list(EXTENSIONS), default="markdown")
+    parser.add_argument("--rows", type=int, default=10, help="Number of records for jsonl/csv/sql")
+    parser.add_argument("--fields", help=f"Record schema for jsonl/csv/sql (default: {DEFAULT_FIELDS})")
+    parser.add_argument("--table", default="lorem", help="Table name for sql format")
+    parser.add_argument("--weighted", action="store_true", help="Zipf-like word frequencies instead of uniform")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible output")
+    parser.add_argument("--batch", metavar="MANIFEST", help="JSONL manifest with one document per line")
+    parser.add_argument("--out-dir", help="Output directory for --batch")
+    parser.add_argument("--jobs", "-j", type=int, help="Worker processes for --batch (default: CPU count)")
 
-    args = parser.parse_args()
+    return parser
 
+
+def generate_document(args):
+    """Generate a complete document from parsed options and return it as a string."""
     # Convert tokens/characters to word count estimate for generation
     # Then we'll truncate to exact character count if needed
     target_chars = None
@@ -373,6 +577,141 @@ def main():
     if target_chars and len(result) > target_chars:
         result = result[:target_chars].rstrip()
 
+    return result
+
+
+def read_manifest(path):
+    """Yield (line_number, spec) pairs from a JSONL manifest, skipping blank lines."""
+    f = sys.stdin if path == "-" else open(path)
+    try:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if line:
+                yield line_number, line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _init_batch_worker(defaults, out_dir):
+    """Store shared batch state in each worker and give it an independent random stream."""
+    global _batch_defaults, _batch_out_dir
+    _batch_defaults = defaults
+    _batch_out_dir = out_dir
+    random.seed()
+
+
+def _write_batch_document(item):
+    """Generate one manifest entry and write it straight to disk. Returns (line_number, error)."""
+    line_number, line = item
+    try:
+        spec = json.loads(line)
+        if not isinstance(spec, dict):
+            raise ValueError("manifest entry must be a JSON object")
+        unknown = set(spec) - set(_batch_defaults) - {"filename"}
+        if unknown:
+            raise ValueError(f"unknown option(s): {', '.join(sorted(unknown))}")
+
+        options = dict(_batch_defaults)
+        options.update((k, v) for k, v in spec.items() if k != "filename")
+        if options["format"] not in EXTENSIONS:
+            raise ValueError(f"invalid format: {options['format']}")
+        args = argparse.Namespace(**options)
+
+        filename = spec.get("filename") or f"doc-{line_number:06d}{EXTENSIONS[args.format]}"
+        path = os.path.normpath(os.path.join(_batch_out_dir, filename))
+        if os.path.isabs(filename) or not path.startswith(os.path.join(_batch_out_dir, "")):
+            raise ValueError(f"filename escapes output directory: {filename}")
+
+        if args.seed is not None:
+            random.seed(args.seed)
+        set_word_model(args.weighted)
+
+        # Fail before creating the file, so a bad entry leaves nothing behind
+        if args.format in RECORD_FORMATS:
+            record_fields(args)
+            content = None
+        else:
+            content = generate_document(args)
+
+        parent = os.path.dirname(path)
+        if parent != _batch_out_dir:
+            os.makedirs(parent, exist_ok=True)
+        try:
+            with open(path, "w") as f:
+                if content is None:
+                    write_records(args, f)
+                else:
+                    f.write(content)
+        except BaseException:
+            # Records are streamed, so remove a partly written file
+            if os.path.exists(path):
+                os.unlink(path)
+            raise
+        return line_number, None
+    except Exception as e:
+        return line_number, str(e)
+
+
+def run_batch(parser, args):
+    """Generate all documents in a manifest across a process pool."""
+    if not args.out_dir:
+        parser.error("--batch requires --out-dir")
+
+    # Manifest entries start from the parser defaults, not from the batch invocation's own flags
+    defaults = vars(parser.parse_args([]))
+    for key in ("output", "batch", "out_dir", "jobs"):
+        del defaults[key]
+
+    out_dir = os.path.abspath(args.out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    written = 0
+    failures = []
+    with multiprocessing.Pool(args.jobs, initializer=_init_batch_worker, initargs=(defaults, out_dir)) as pool:
+        # Small entries are cheap, so hand them to workers in chunks to amortise IPC
+        for line_number, error in pool.imap_unordered(_write_batch_document, read_manifest(args.batch), chunksize=256):
+            if error:
+                failures.append((line_number, error))
+            else:
+                written += 1
+
+    for line_number, error in sorted(failures):
+        print(f"Error: manifest line {line_number}: {error}", file=sys.stderr)
+    print(f"Written {written} documents to {out_dir}")
+    if failures:
+        sys.exit(1)
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+
+    if args.batch:
+        run_batch(parser, args)
+        return
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    set_word_model(args.weighted)
+
+    if args.format in RECORD_FORMATS:
+        try:
+            parse_fields(args.fields or DEFAULT_FIELDS)
+        except ValueError as e:
+            parser.error(f"--fields: {e}")
+        if not args.table.isidentifier():
+            parser.error(f"--table: invalid table name: {args.table!r}")
+        if args.output:
+            with open(args.output, "w") as f:
+                write_records(args, f)
+            print(f"Written to {args.output}")
+        else:
+            write_records(args, sys.stdout)
+        return
+
+    result = generate_document(args)
+
     if args.output:
         with open(args.output, "w") as f:
             f.write(result)
@@ -11,13 +11,195 @@ Generate images using Google's Nano Banana Pro (Gemini 3 Pro Image) API.
 
 Usage:
     uv run generate_image.py --prompt "your image description" --filename "output.png" [--resolution 1K|2K|4K] [--api-key KEY]
+
+    # Many images in one run
+    uv run generate_image.py --batch prompts.jsonl [--concurrency N] [--retries N]
+
+    # Reuse earlier results for identical requests
+    uv run generate_image.py --cache --prompt "..." --filename "output.png" [--refresh]
+
+    # Multi-turn editing: later turns edit the previous turn's image
+    uv run generate_image.py --session NAME --prompt "..." --filename "v1.png" --input-image photo.jpg
+    uv run generate_image.py --session NAME --prompt "now ..." --filename "v2.png"
 """
 
 import argparse
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import json
 import os
+import random
+import re
+import sqlite3
 import sys
+import threading
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 
+MODEL = "gemini-3-pro-image-preview"
+
+# HTTP status codes worth retrying in batch mode (rate limits and server errors)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SIGNATURE = b"\xff\xd8\xff"
+
+# Output formats: Pillow format name, default quality, and file extensions
+OUTPUT_FORMATS = {"png": "PNG", "jpeg": "JPEG", "webp": "WEBP", "avif": "AVIF"}
+DEFAULT_QUALITY = {"jpeg": 90, "webp": 90, "avif": 80}
+OUTPUT_EXTENSIONS = {".png": "png", ".jpg": "jpeg", ".jpeg": "jpeg", ".webp": "webp", ".avif": "avif"}
+
+# Longest side of the input image worth uploading for each output resolution
+UPLOAD_MAX_SIDE = {"1K": 1024, "2K": 2048, "4K": 4096}
+UPLOAD_FORMATS = {"jpeg": ("JPEG", "image/jpeg"), "webp": ("WEBP", "image/webp")}
+
+# Setting this enables the result cache and overrides its location
+CACHE_PATH_ENV = "NANO_BANANA_PRO_CACHE"
+DEFAULT_CACHE_MAX_MB = 512
+
+# Files uploaded with the Files API expire after 48 hours; stop a little early
+SESSION_UPLOAD_TTL = 47 * 3600
+
+# Setting this appends one JSON record per API call to the named file
+TELEMETRY_ENV = "SKILLS_TELEMETRY"
+
+# The call whose HTTP requests are being made on this thread or task
+_current_call = contextvars.ContextVar("telemetry_call", default=None)
+
+
+class Telemetry:
+    """Per-call timings and sizes, appended as JSON lines to $SKILLS_TELEMETRY.
+
+    Process-wide stages (SDK import, client setup) are measured once and
+    repeated in every record the process writes.
+    """
+
+    def __init__(self, script: str):
+        self.script = script
+        self.path = os.environ.get(TELEMETRY_ENV)
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[f"{name}_s"] = round(time.perf_counter() - start, 6)
+
+    def call(self, operation: str, **fields) -> "TelemetryCall":
+        return TelemetryCall(self, operation, fields)
+
+    def httpx_hooks(self, asynchronous: bool = False) -> dict:
+        """Return httpx event hooks that attribute each request to the current call."""
+        def on_request(request):
+            if call := _current_call.get():
+                call.on_request(request)
+
+        def on_response(response):
+            if call := _current_call.get():
+                call.on_response(response)
+
+        if asynchronous:
+            async def on_request_async(request):
+                on_request(request)
+
+            async def on_response_async(response):
+                on_response(response)
+
+            return {"request": [on_request_async], "response": [on_response_async]}
+        return {"request": [on_request], "response": [on_response]}
+
+    def write(self, record: dict):
+        if not self.path:
+            return
+        line = (json.dumps(record) + "\n").encode()
+        try:
+            # A single O_APPEND write keeps records whole across threads and processes
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            print(f"Warning: could not write telemetry to {self.path}: {e}", file=sys.stderr)
+
+
+class TelemetryCall:
+    """Timings, sizes, retries and usage of one API call, written when its with block exits."""
+
+    def __init__(self, telemetry: Telemetry, operation: str, fields: dict):
+        self.telemetry = telemetry
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.fields = {"operation": operation, **fields}
+        self.stages = {}
+        self.counts = {"http_requests": 0, "request_bytes": 0, "response_bytes": 0, "retries": 0,
+                       "upload_bytes": 0}
+        self.usage = None
+        self.error = None
+        self.sent = None
+        self.responses = []
+
+    def __enter__(self):
+        self.token = _current_call.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_call.reset(self.token)
+        if isinstance(exc, Exception) and self.error is None:
+            self.error = str(exc)
+        self.telemetry.write(self.record())
+        return False
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            key = f"{name}_s"
+            self.stages[key] = round(self.stages.get(key, 0) + time.perf_counter() - start, 6)
+
+    def fail(self, error):
+        self.error = str(error)
+
+    def on_request(self, request):
+        self.counts["http_requests"] += 1
+        self.counts["request_bytes"] += int(request.headers.get("content-length") or 0)
+        self.sent = time.perf_counter()
+
+    def on_response(self, response):
+        # Response hooks run once the headers arrive, before the body is read;
+        # Files API uploads are counted but don't stand in for the API's latency
+        if not response.request.url.path.startswith("/upload/"):
+            self.stages["first_byte_s"] = round(time.perf_counter() - self.sent, 6)
+        self.responses.append(response)
+
+    def record(self) -> dict:
+        self.counts["response_bytes"] = sum(r.num_bytes_downloaded for r in self.responses)
+        record = {
+            "time": datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec="milliseconds"),
+            "script": self.telemetry.script,
+            **self.fields,
+            "status": "error" if self.error else "ok",
+            **self.telemetry.stages,
+            **self.stages,
+            "total_s": round(time.perf_counter() - self.start, 6),
+            **self.counts,
+        }
+        if self.error:
+            record["error"] = self.error
+        if self.usage:
+            record["usage"] = self.usage
+        return record
+
+
+TELEMETRY = Telemetry("nano-banana-pro")
+
 
 def get_api_key(provided_key: str | None) -> str | None:
     """Get API key from argument first, then environment."""
@@ -26,18 +208,566 @@ def get_api_key(provided_key: str | None) -> str | None:
     return os.environ.get("GEMINI_API_KEY")
 
 
+def auto_resolution(width: int, height: int) -> str:
+    """Map an input image size to the closest output resolution."""
+    max_dim = max(width, height)
+    if max_dim >= 3000:
+        return "4K"
+    elif max_dim >= 1500:
+        return "2K"
+    return "1K"
+
+
+def prepare_input_image(path: str, resolution: str | None, upload_format: str = "jpeg",
+                        quality: int = 90) -> tuple[bytes, str, str, str]:
+    """Downscale and re-encode an input image file for upload; see prepare_image_bytes()."""
+    return prepare_image_bytes(Path(path).read_bytes(), resolution, upload_format, quality)
+
+
+def prepare_image_bytes(original: bytes, resolution: str | None, upload_format: str = "jpeg",
+                        quality: int = 90) -> tuple[bytes, str, str, str]:
+    """Downscale and re-encode an image for upload.
+
+    The image is shrunk to the longest side the target resolution can use
+    (JPEGs are decoded at reduced scale in draft mode) and re-encoded as JPEG
+    or WebP; images with transparency always use WebP. The original bytes are
+    kept when that would not make them smaller, or for upload_format
+    "original". A resolution of None is auto-detected from the image size.
+
+    Returns (bytes, MIME type, resolution, human-readable size report).
+    """
+    import math
+    from io import BytesIO
+    from PIL import Image as PILImage, ImageOps
+
+    start = time.perf_counter()
+    # Opening only parses the header; pixels are decoded on first access
+    image = PILImage.open(BytesIO(original))
+    width, height = image.size
+    if resolution is None:
+        resolution = auto_resolution(width, height)
+    mime_type = PILImage.MIME.get(image.format, "application/octet-stream")
+    if upload_format == "original":
+        return original, mime_type, resolution, f"{width}x{height}, {len(original)} bytes (sent as-is)"
+
+    max_side = UPLOAD_MAX_SIDE[resolution]
+    resized = max(width, height) > max_side
+    if resized and image.format == "JPEG":
+        scale = max_side / max(width, height)
+        image.draft("RGB", (math.ceil(width * scale), math.ceil(height * scale)))
+    # Apply the EXIF orientation, which re-encoding would otherwise drop
+    image = ImageOps.exif_transpose(image)
+    if resized:
+        image.thumbnail((max_side, max_side), PILImage.LANCZOS)
+
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    pil_format, upload_mime = UPLOAD_FORMATS["webp" if has_alpha else upload_format]
+    if pil_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, pil_format, quality=quality)
+    data = buffer.getvalue()
+
+    if not resized and len(data) >= len(original):
+        return original, mime_type, resolution, f"{width}x{height}, {len(original)} bytes (sent as-is)"
+    seconds = time.perf_counter() - start
+    report = (f"{width}x{height} {len(original)} bytes -> {image.width}x{image.height} "
+              f"{pil_format} {len(data)} bytes ({len(data) / len(original):.0%}, {seconds * 1000:.0f} ms)")
+    return data, upload_mime, resolution, report
+
+
+def build_config(types, resolution: str):
+    """Build the generation config for the requested resolution."""
+    return types.GenerateContentConfig(
+        response_modalities=["TEXT", "IMAGE"],
+        image_config=types.ImageConfig(
+            image_size=resolution
+        )
+    )
+
+
+def is_rgb_png(image_data: bytes) -> bool:
+    """Return True if the data is an 8-bit RGB PNG, judging from its IHDR header."""
+    # Signature (8 bytes), IHDR length and type (8), width and height (8),
+    # then bit depth and colour type (2 = truecolour without alpha)
+    return (
+        len(image_data) >= 26
+        and image_data[:8] == PNG_SIGNATURE
+        and image_data[12:16] == b"IHDR"
+        and image_data[24] == 8
+        and image_data[25] == 2
+    )
+
+
+def output_format_for(output_path: Path) -> str:
+    """Pick the output format from the file extension, defaulting to PNG."""
+    return OUTPUT_EXTENSIONS.get(output_path.suffix.lower(), "png")
+
+
+def save_options(args) -> dict:
+    """Return the save_image_bytes() keyword arguments selected on the command line."""
+    return {
+        "output_format": args.format,
+        "quality": args.quality,
+        "compress_level": args.compression_level,
+        "thumbnail": args.thumbnail,
+    }
+
+
+def thumbnail_path(output_path: Path) -> Path:
+    """Return the preview path for an output file, e.g. sunset.thumb.png."""
+    return output_path.with_name(f"{output_path.stem}.thumb{output_path.suffix}")
+
+
+def encode_image(image, path: Path, output_format: str, quality: int | None, compress_level: int | None):
+    """Encode an RGB image to a file in the given output format."""
+    if output_format == "png":
+        image.save(str(path), "PNG", compress_level=6 if compress_level is None else compress_level)
+    else:
+        image.save(str(path), OUTPUT_FORMATS[output_format],
+                   quality=DEFAULT_QUALITY[output_format] if quality is None else quality)
+
+
+def save_image_bytes(image_data, output_path: Path, output_format: str | None = None,
+                     quality: int | None = None, compress_level: int | None = None,
+                     thumbnail: int | None = None):
+    """Save returned image data as an RGB image, decoding only when a conversion is needed.
+
+    The format defaults to the one implied by the file extension (PNG if
+    unknown). With a thumbnail size, a preview no larger than that is written
+    next to the output first, while the full-size image is encoded on a worker
+    thread.
+    """
+    # inline_data.data is already bytes, not base64
+    if isinstance(image_data, str):
+        # If it's a string, it might be base64
+        import base64
+        image_data = base64.b64decode(image_data)
+
+    output_format = output_format or output_format_for(output_path)
+    # Already what we would produce: write the bytes as-is
+    as_is = (
+        (output_format == "png" and compress_level is None and is_rgb_png(image_data))
+        or (output_format == "jpeg" and quality is None and image_data[:3] == JPEG_SIGNATURE)
+    )
+    if as_is and not thumbnail:
+        output_path.write_bytes(image_data)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+    from io import BytesIO
+    from PIL import Image as PILImage
+
+    image = PILImage.open(BytesIO(image_data))
+    # Decode now: a lazily loaded image must not be decoded from two threads
+    image.load()
+
+    # Ensure RGB mode (convert RGBA to RGB with white background if needed)
+    if image.mode == 'RGBA':
+        rgb_image = PILImage.new('RGB', image.size, (255, 255, 255))
+        rgb_image.paste(image, mask=image.split()[3])
+        image = rgb_image
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    # Pillow releases the GIL while encoding, so the full-size image is
+    # written in parallel with the preview
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        if as_is:
+            full = executor.submit(output_path.write_bytes, image_data)
+        else:
+            full = executor.submit(encode_image, image, output_path, output_format, quality, compress_level)
+        if thumbnail:
+            preview = image.copy()
+            preview.thumbnail((thumbnail, thumbnail), PILImage.LANCZOS)
+            preview_path = thumbnail_path(output_path)
+            encode_image(preview, preview_path, output_format, quality, compress_level)
+            print(f"Thumbnail saved: {preview_path.resolve()}", flush=True)
+        full.result()
+
+
+def response_usage(response) -> dict | None:
+    """Return the token counts of a response as a plain dict, if it has any."""
+    usage = getattr(response, "usage_metadata", None)
+    return usage.model_dump(mode="json", exclude_none=True) if usage else None
+
+
+def read_response(response) -> tuple[bytes | None, list[str]]:
+    """Return the (last) image and the text parts of a response."""
+    image_data = None
+    texts = []
+    for part in response.parts or []:
+        if part.text is not None:
+            texts.append(part.text)
+        elif part.inline_data is not None:
+            image_data = part.inline_data.data
+    return image_data, texts
+
+
+def default_cache_path() -> Path:
+    """Return the cache database path, honouring NANO_BANANA_PRO_CACHE and XDG_CACHE_HOME."""
+    if os.environ.get(CACHE_PATH_ENV):
+        return Path(os.environ[CACHE_PATH_ENV])
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "nano-banana-pro" / "images.sqlite3"
+
+
+def cache_key(prompt: str, input_bytes: bytes | None, resolution: str) -> str:
+    """Hash everything that determines a generation: model, prompt, input image and resolution."""
+    digest = hashlib.sha256()
+    for field in (MODEL.encode(), prompt.encode(), input_bytes or b"", resolution.encode()):
+        # Length-prefix each field so different splits never collide
+        digest.update(len(field).to_bytes(8, "big"))
+        digest.update(field)
+    return digest.hexdigest()
+
+
+class ImageCache:
+    """SQLite-backed cache of generated images with size-bounded LRU eviction.
+
+    Entries are keyed by cache_key() and hold the image bytes exactly as the
+    API returned them, plus any text parts of the response.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(path), timeout=30, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                key TEXT PRIMARY KEY,
+                image BLOB NOT NULL,
+                texts TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS images_lru ON images (accessed_at)")
+
+    def get(self, key: str) -> tuple[bytes, list[str]] | None:
+        """Return (image bytes, text parts) for a key, or None."""
+        with self.lock:
+            row = self.db.execute("SELECT image, texts FROM images WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE images SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return row[0], json.loads(row[1])
+
+    def put(self, key: str, image_data: bytes, texts: list[str]):
+        """Store a result and evict least recently used entries beyond the size limit."""
+        now = time.time()
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, image_data, json.dumps(texts), len(image_data), now, now),
+                )
+                total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM images").fetchone()[0]
+                if total > self.max_bytes:
+                    rows = self.db.execute("SELECT key, size FROM images ORDER BY accessed_at").fetchall()
+                    for old_key, size in rows:
+                        if total <= self.max_bytes:
+                            break
+                        self.db.execute("DELETE FROM images WHERE key = ?", (old_key,))
+                        total -= size
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+
+
+def session_path(name: str) -> Path:
+    """Return the file holding a named editing session, next to the result cache."""
+    if not re.fullmatch(r"[\w.-]+", name):
+        raise ValueError(f"invalid session name: {name!r} (use letters, digits, '.', '_' and '-')")
+    return default_cache_path().parent / "sessions" / f"{name}.json"
+
+
+def load_session(path: Path) -> dict | None:
+    """Return a saved session, or None if there is none."""
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return None
+
+
+def save_session(path: Path, session: dict):
+    """Write a session atomically so an interrupted run never leaves it half-written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(session))
+    os.replace(tmp_path, path)
+
+
+def upload_model_images(client, types, content, resolution: str, upload: tuple[str, int],
+                        call: TelemetryCall):
+    """Replace the inline images of a model turn with references to Files API uploads.
+
+    The images are downscaled and re-encoded like input images first. Each
+    part keeps its thought signature, which the model needs to continue from it.
+    """
+    from io import BytesIO
+
+    for part in content.parts or []:
+        if part.inline_data is None:
+            continue
+        data, mime_type, _, _ = prepare_image_bytes(part.inline_data.data, resolution, *upload)
+        with call.stage("upload"):
+            uploaded = client.files.upload(file=BytesIO(data), config=types.UploadFileConfig(mime_type=mime_type))
+        call.counts["upload_bytes"] += len(data)
+        part.inline_data = None
+        part.file_data = types.FileData(file_uri=uploaded.uri, mime_type=uploaded.mime_type)
+
+
+def prune_history(history: list[dict]) -> list[dict]:
+    """Drop returned images from all but the latest model turn.
+
+    Every turn sends the whole history, so keeping only the image being edited
+    (by URI) bounds the request size however long the session runs.
+    """
+    model_turns = [i for i, content in enumerate(history) if content.get("role") == "model"]
+    for i in model_turns[:-1]:
+        parts = [part for part in history[i].get("parts", [])
+                 if "inline_data" not in part and "file_data" not in part]
+        history[i]["parts"] = parts or [{"text": "(image)"}]
+    return history
+
+
+def run_session_turn(client, types, args, path: Path, call: TelemetryCall) -> None:
+    """Send one turn of a multi-turn editing session and save the image it returns."""
+    from io import BytesIO
+
+    session = None if args.input_image else load_session(path)
+    if session is None:
+        # Start (or restart) the session; the source image is uploaded once
+        # with the Files API and referenced by URI in every later turn
+        session = {"resolution": args.resolution, "history": [], "turns": 0}
+        message = args.prompt
+        if args.input_image:
+            # Auto-detect resolution if not explicitly set by user
+            data, mime_type, session["resolution"], report = prepare_input_image(
+                args.input_image, None if args.resolution == "1K" else args.resolution,
+                args.upload_format, args.upload_quality,
+            )
+            print(f"Input image: {report}")
+            with call.stage("upload"):
+                uploaded = client.files.upload(file=BytesIO(data), config=types.UploadFileConfig(mime_type=mime_type))
+            call.counts["upload_bytes"] += len(data)
+            session["uploaded_at"] = time.time()
+            print(f"Uploaded input image: {args.input_image} (resolution {session['resolution']})")
+            message = [types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type), args.prompt]
+        print(f"Started session '{args.session}'")
+    else:
+        if time.time() - session.get("uploaded_at", time.time()) > SESSION_UPLOAD_TTL:
+            raise RuntimeError("the session's uploaded input image has expired; "
+                               "start a new session with --input-image")
+        message = args.prompt
+
+    # An explicit resolution overrides the session's for this and later turns
+    if args.resolution != "1K":
+        session["resolution"] = args.resolution
+    print(f"Session '{args.session}' turn {session['turns'] + 1}, resolution {session['resolution']}...")
+
+    chat = client.chats.create(
+        model=MODEL,
+        config=build_config(types, session["resolution"]),
+        history=[types.Content.model_validate(content) for content in session["history"]],
+    )
+    with call.stage("request"):
+        response = chat.send_message(message)
+
+    with call.stage("decode"):
+        image_data, texts = read_response(response)
+    call.usage = response_usage(response)
+    for text in texts:
+        print(f"Model response: {text}")
+    if image_data is None:
+        raise RuntimeError("No image was generated in the response")
+
+    output_path = Path(args.filename)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with call.stage("write"):
+        save_image_bytes(image_data, output_path, **save_options(args))
+
+    # Upload the new image so later turns reference it instead of resending it
+    history = chat.get_history(curated=True)
+    upload_model_images(client, types, history[-1], session["resolution"],
+                        (args.upload_format, args.upload_quality), call)
+    session.setdefault("uploaded_at", time.time())
+
+    session["turns"] += 1
+    session["history"] = prune_history(
+        [content.model_dump(mode="json", exclude_none=True) for content in history]
+    )
+    save_session(path, session)
+    print(f"\nImage saved: {output_path.resolve()}")
+
+
+def is_retryable(error: Exception) -> bool:
+    """Return True for rate limiting, server errors and network failures."""
+    import httpx
+    from google.genai import errors
+
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS
+    return isinstance(error, httpx.TransportError)
+
+
+def read_batch(path: str) -> list[dict]:
+    """Read batch items from a JSONL file ("-" for stdin).
+
+    Each line is {"prompt": ..., "filename": ..., "input_image": optional,
+    "resolution": optional}.
+    """
+    f = sys.stdin if path == "-" else open(path)
+    items = []
+    try:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if not isinstance(item, dict) or not item.get("prompt") or not item.get("filename"):
+                raise ValueError(f"line {line_number}: each entry needs a prompt and a filename")
+            if item.get("resolution") not in (None, "1K", "2K", "4K"):
+                raise ValueError(f"line {line_number}: resolution must be 1K, 2K or 4K")
+            items.append(item)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return items
+
+
+def batch_item_cache_key(item: dict, default_resolution: str) -> str:
+    """Return the cache key of a batch item, reading its input image if it has one."""
+    input_bytes = Path(item["input_image"]).read_bytes() if item.get("input_image") else None
+    # Resolution is auto-detected from the input image unless the item or
+    # --resolution (anything but the 1K default) sets one, as in single mode
+    resolution = item.get("resolution") or (
+        "auto" if input_bytes and default_resolution == "1K" else default_resolution
+    )
+    return cache_key(item["prompt"], input_bytes, resolution)
+
+
+def prepare_batch_item(types, item: dict, default_resolution: str, upload: tuple[str, int]):
+    """Prepare the item's input image (if any) and return (contents, resolution)."""
+    resolution = item.get("resolution")
+    if item.get("input_image"):
+        # Auto-detect resolution unless the item or --resolution sets one
+        if resolution is None and default_resolution != "1K":
+            resolution = default_resolution
+        data, mime_type, resolution, _ = prepare_input_image(item["input_image"], resolution, *upload)
+        return [types.Part.from_bytes(data=data, mime_type=mime_type), item["prompt"]], resolution
+    return item["prompt"], resolution or default_resolution
+
+
+async def generate_batch_item(client, types, item: dict, index: int, default_resolution: str,
+                              semaphore: asyncio.Semaphore, retries: int, upload: tuple[str, int],
+                              options: dict, cache: ImageCache | None = None, refresh: bool = False) -> dict:
+    """Generate and save one batch image, retrying transient failures with jittered backoff."""
+    output_path = Path(item["filename"])
+    result = {"index": index, "filename": str(output_path), "attempts": 0}
+    async with semaphore:
+        start = time.perf_counter()
+        call = TELEMETRY.call("edit" if item.get("input_image") else "generate", model=MODEL, batch_index=index)
+        with call:
+            try:
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                key = None
+                if cache:
+                    key = await asyncio.to_thread(batch_item_cache_key, item, default_resolution)
+                    cached = None if refresh else cache.get(key)
+                    if cached:
+                        call.fields["cached"] = True
+                        with call.stage("write"):
+                            await asyncio.to_thread(save_image_bytes, cached[0], output_path, **options)
+                        result.update(status="ok", text=cached[1], cached=True,
+                                      seconds=time.perf_counter() - start)
+                        print(f"Image saved: {output_path.resolve()} (cached)", flush=True)
+                        return result
+                contents, resolution = await asyncio.to_thread(prepare_batch_item, types, item,
+                                                               default_resolution, upload)
+                call.fields["resolution"] = resolution
+                config = build_config(types, resolution)
+                while True:
+                    result["attempts"] += 1
+                    try:
+                        with call.stage("request"):
+                            response = await client.aio.models.generate_content(
+                                model=MODEL, contents=contents, config=config
+                            )
+                        break
+                    except Exception as e:
+                        if result["attempts"] > retries or not is_retryable(e):
+                            raise
+                        call.counts["retries"] += 1
+                        await asyncio.sleep(random.uniform(0, min(60, 2 ** result["attempts"])))
+                with call.stage("decode"):
+                    image_data, texts = read_response(response)
+                call.usage = response_usage(response)
+                if image_data is None:
+                    raise RuntimeError("No image was generated in the response")
+                # Decoding and encoding are CPU-bound, so keep them off the event loop
+                with call.stage("write"):
+                    await asyncio.to_thread(save_image_bytes, image_data, output_path, **options)
+                if cache:
+                    cache.put(key, image_data, texts)
+                result["status"] = "ok"
+                result["text"] = texts
+            except Exception as e:
+                call.fail(e)
+                result["status"] = "failed"
+                result["error"] = str(e)
+        result["seconds"] = time.perf_counter() - start
+
+    if result["status"] == "ok":
+        print(f"Image saved: {output_path.resolve()} ({result['seconds']:.1f}s)", flush=True)
+    else:
+        print(f"Error: {output_path}: {result['error']}", file=sys.stderr, flush=True)
+    return result
+
+
+async def run_batch(client, types, items: list[dict], default_resolution: str,
+                    concurrency: int, retries: int, upload: tuple[str, int], options: dict,
+                    cache: ImageCache | None = None, refresh: bool = False) -> list[dict]:
+    """Generate all batch items with at most `concurrency` requests in flight."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    tasks = [
+        generate_batch_item(client, types, item, index, default_resolution, semaphore, retries, upload,
+                            options, cache, refresh)
+        for index, item in enumerate(items, 1)
+    ]
+    return await asyncio.gather(*tasks)
+
+
+def print_batch_summary(results: list[dict], wall_time: float):
+    """Print per-item latency and a failure summary."""
+    print("\nBatch summary:")
+    for r in results:
+        detail = "  (cached)" if r.get("cached") else "" if r["status"] == "ok" else f"  {r['error']}"
+        print(f"  {r['index']:>4}  {r['status']:<6}  {r['seconds']:6.1f}s  "
+              f"{r['attempts']} attempt(s)  {r['filename']}{detail}")
+    ok = [r["seconds"] for r in results if r["status"] == "ok"]
+    failed = len(results) - len(ok)
+    print(f"\n{len(ok)} succeeded, {failed} failed in {wall_time:.1f}s")
+    if ok:
+        ok.sort()
+        print(f"Latency: median {ok[len(ok) // 2]:.1f}s, max {ok[-1]:.1f}s")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Generate images using Nano Banana Pro (Gemini 3 Pro Image)"
     )
     parser.add_argument(
         "--prompt", "-p",
-        required=True,
         help="Image description/prompt"
     )
     parser.add_argument(
         "--filename", "-f",
-        required=True,
         help="Output filename (e.g., sunset-mountains.png)"
     )
     parser.add_argument(
@@ -50,13 +780,104 @@ def main():
         default="1K",
         help="Output resolution: 1K (default), 2K, or 4K"
     )
+    parser.add_argument(
+        "--format",
+        choices=list(OUTPUT_FORMATS),
+        help="Output image format (default: from the filename extension, PNG if unknown)"
+    )
+    parser.add_argument(
+        "--quality", "-q",
+        type=int,
+        choices=range(1, 101),
+        metavar="1-100",
+        help="JPEG/WebP/AVIF output quality, 1-100 (default: 90 for JPEG and WebP, 80 for AVIF)"
+    )
+    parser.add_argument(
+        "--compression-level",
+        type=int,
+        choices=range(10),
+        metavar="0-9",
+        help="PNG compression level: 0 is fastest and largest, 9 smallest and slowest (default: 6)"
+    )
+    parser.add_argument(
+        "--thumbnail", "-t",
+        type=int,
+        metavar="SIZE",
+        help="Also write a preview no larger than SIZE pixels (name.thumb.ext) before the full image"
+    )
+    parser.add_argument(
+        "--upload-format",
+        choices=["jpeg", "webp", "original"],
+        default="jpeg",
+        help="Re-encode input images as jpeg (default) or webp, downscaled to the output resolution, "
+             "or upload the original file"
+    )
+    parser.add_argument(
+        "--upload-quality",
+        type=int,
+        default=90,
+        help="JPEG/WebP quality for re-encoded input images (default: 90)"
+    )
     parser.add_argument(
         "--api-key", "-k",
         help="Gemini API key (overrides GEMINI_API_KEY env var)"
     )
+    parser.add_argument(
+        "--batch", "-b",
+        help="JSONL file with one {\"prompt\", \"filename\", \"input_image\"?, \"resolution\"?} per line"
+    )
+    parser.add_argument(
+        "--concurrency", "-c",
+        type=int,
+        default=4,
+        help="Maximum requests in flight in batch mode (default: 4)"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=3,
+        help="Retries per batch item on rate limits and server errors (default: 3)"
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help=f"Reuse results of identical earlier requests (also enabled by setting {CACHE_PATH_ENV})"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Disable the result cache even if {CACHE_PATH_ENV} is set"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Regenerate even if a cached result exists, and update the cache"
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=DEFAULT_CACHE_MAX_MB,
+        help=f"Cache size limit in MB (default: {DEFAULT_CACHE_MAX_MB})"
+    )
+    parser.add_argument(
+        "--session", "-s",
+        help="Named multi-turn editing session; later turns edit the previous turn's image "
+             "(--input-image starts a new session)"
+    )
 
     args = parser.parse_args()
 
+    if not args.batch and not (args.prompt and args.filename):
+        parser.error("--prompt and --filename are required (or use --batch)")
+    if args.batch and args.session:
+        parser.error("--session cannot be combined with --batch")
+    if args.thumbnail is not None and args.thumbnail < 1:
+        parser.error("--thumbnail must be greater than 0")
+    if args.format == "avif" or (args.filename and output_format_for(Path(args.filename)) == "avif"):
+        from PIL import features
+        if not features.check("avif"):
+            parser.error("AVIF output needs Pillow 11.2 or newer built with libavif")
+
     # Get API key
     api_key = get_api_key(args.api_key)
     if not api_key:
@@ -66,101 +887,148 @@ def main():
         print("  2. Set GEMINI_API_KEY environment variable", file=sys.stderr)
         sys.exit(1)
 
+    if args.batch:
+        try:
+            items = read_batch(args.batch)
+        except Exception as e:
+            print(f"Error reading batch file: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    if args.session:
+        try:
+            path = session_path(args.session)
+        except ValueError as e:
+            parser.error(str(e))
+
+    # Session turns depend on the conversation so far and are never cached
+    cache = None
+    if (args.cache or args.refresh or os.environ.get(CACHE_PATH_ENV)) and not args.no_cache and not args.session:
+        cache = ImageCache(default_cache_path(), max_bytes=int(args.cache_max_mb * 1024 * 1024))
+
+    # Cache hits never pay for importing the SDK or touching the network
+    key = None
+    if cache and not args.batch:
+        try:
+            input_bytes = Path(args.input_image).read_bytes() if args.input_image else None
+        except OSError as e:
+            print(f"Error loading input image: {e}", file=sys.stderr)
+            sys.exit(1)
+        # The default resolution is auto-detected from an input image
+        resolution = "auto" if input_bytes and args.resolution == "1K" else args.resolution
+        key = cache_key(args.prompt, input_bytes, resolution)
+        cached = None if args.refresh else cache.get(key)
+        if cached:
+            output_path = Path(args.filename)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            with TELEMETRY.call("generate", model=MODEL, cached=True) as call, call.stage("write"):
+                save_image_bytes(cached[0], output_path, **save_options(args))
+            for text in cached[1]:
+                print(f"Model response: {text}")
+            print(f"\nImage saved: {output_path.resolve()} (cached)")
+            return
+
     # Import here after checking API key to avoid slow import on error
-    from google import genai
-    from google.genai import types
-    from PIL import Image as PILImage
+    with TELEMETRY.stage("import"):
+        from google import genai
+        from google.genai import types
 
     # Initialise client
-    client = genai.Client(api_key=api_key)
+    with TELEMETRY.stage("client_init"):
+        http_options = None
+        if TELEMETRY.path:
+            http_options = types.HttpOptions(
+                client_args={"event_hooks": TELEMETRY.httpx_hooks()},
+                async_client_args={"event_hooks": TELEMETRY.httpx_hooks(asynchronous=True)},
+            )
+        client = genai.Client(api_key=api_key, http_options=http_options)
+
+    if args.batch:
+        print(f"Generating {len(items)} images (concurrency {args.concurrency})...")
+        start = time.perf_counter()
+        upload = (args.upload_format, args.upload_quality)
+        results = asyncio.run(run_batch(client, types, items, args.resolution, args.concurrency,
+                                        args.retries, upload, save_options(args), cache, args.refresh))
+        print_batch_summary(results, time.perf_counter() - start)
+        if any(r["status"] != "ok" for r in results):
+            sys.exit(1)
+        return
+
+    if args.session:
+        with TELEMETRY.call("session_turn", model=MODEL, session=args.session) as call:
+            try:
+                run_session_turn(client, types, args, path, call)
+            except Exception as e:
+                call.fail(e)
+                print(f"Error generating image: {e}", file=sys.stderr)
+                sys.exit(1)
+        return
 
     # Set up output path
     output_path = Path(args.filename)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
     # Load input image if provided
-    input_image = None
+    input_part = None
     output_resolution = args.resolution
     if args.input_image:
         try:
-            input_image = PILImage.open(args.input_image)
-            print(f"Loaded input image: {args.input_image}")
-
             # Auto-detect resolution if not explicitly set by user
+            data, mime_type, output_resolution, report = prepare_input_image(
+                args.input_image, None if args.resolution == "1K" else args.resolution,
+                args.upload_format, args.upload_quality,
+            )
+            input_part = types.Part.from_bytes(data=data, mime_type=mime_type)
+            print(f"Loaded input image: {args.input_image}")
+            print(f"Upload: {report}")
             if args.resolution == "1K":  # Default value
-                # Map input image size to resolution
-                width, height = input_image.size
-                max_dim = max(width, height)
-                if max_dim >= 3000:
-                    output_resolution = "4K"
-                elif max_dim >= 1500:
-                    output_resolution = "2K"
-                else:
-                    output_resolution = "1K"
-                print(f"Auto-detected resolution: {output_resolution} (from input {width}x{height})")
+                print(f"Auto-detected resolution: {output_resolution}")
         except Exception as e:
             print(f"Error loading input image: {e}", file=sys.stderr)
             sys.exit(1)
 
     # Build contents (image first if editing, prompt only if generating)
-    if input_image:
-        contents = [input_image, args.prompt]
+    if input_part:
+        contents = [input_part, args.prompt]
         print(f"Editing image with resolution {output_resolution}...")
     else:
         contents = args.prompt
         print(f"Generating image with resolution {output_resolution}...")
 
-    try:
-        response = client.models.generate_content(
-            model="gemini-3-pro-image-preview",
-            contents=contents,
-            config=types.GenerateContentConfig(
-                response_modalities=["TEXT", "IMAGE"],
-                image_config=types.ImageConfig(
-                    image_size=output_resolution
+    call = TELEMETRY.call("edit" if input_part else "generate", model=MODEL, resolution=output_resolution)
+    with call:
+        try:
+            start = time.perf_counter()
+            with call.stage("request"):
+                response = client.models.generate_content(
+                    model=MODEL,
+                    contents=contents,
+                    config=build_config(types, output_resolution)
                 )
-            )
-        )
-        
-        # Process response and convert to PNG
-        image_saved = False
-        for part in response.parts:
-            if part.text is not None:
-                print(f"Model response: {part.text}")
-            elif part.inline_data is not None:
-                # Convert inline data to PIL Image and save as PNG
-                from io import BytesIO
-
-                # inline_data.data is already bytes, not base64
-                image_data = part.inline_data.data
-                if isinstance(image_data, str):
-                    # If it's a string, it might be base64
-                    import base64
-                    image_data = base64.b64decode(image_data)
-
-                image = PILImage.open(BytesIO(image_data))
-
-                # Ensure RGB mode for PNG (convert RGBA to RGB with white background if needed)
-                if image.mode == 'RGBA':
-                    rgb_image = PILImage.new('RGB', image.size, (255, 255, 255))
-                    rgb_image.paste(image, mask=image.split()[3])
-                    rgb_image.save(str(output_path), 'PNG')
-                elif image.mode == 'RGB':
-                    image.save(str(output_path), 'PNG')
-                else:
-                    image.convert('RGB').save(str(output_path), 'PNG')
-                image_saved = True
-        
-        if image_saved:
-            full_path = output_path.resolve()
-            print(f"\nImage saved: {full_path}")
-        else:
-            print("Error: No image was generated in the response.", file=sys.stderr)
+            print(f"Request completed in {time.perf_counter() - start:.1f}s")
+
+            # Process response and convert to PNG
+            with call.stage("decode"):
+                image_data, texts = read_response(response)
+            call.usage = response_usage(response)
+            for text in texts:
+                print(f"Model response: {text}")
+
+            if image_data is not None:
+                with call.stage("write"):
+                    save_image_bytes(image_data, output_path, **save_options(args))
+                if cache:
+                    cache.put(key, image_data, texts)
+                full_path = output_path.resolve()
+                print(f"\nImage saved: {full_path}")
+            else:
+                call.fail("No image was generated in the response")
+                print("Error: No image was generated in the response.", file=sys.stderr)
+                sys.exit(1)
+
+        except Exception as e:
+            call.fail(e)
+            print(f"Error generating image: {e}", file=sys.stderr)
             sys.exit(1)
-            
-    except Exception as e:
-        print(f"Error generating image: {e}", file=sys.stderr)
-        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,14 @@
 #!/usr/bin/env bun
+import { appendFileSync } from "node:fs";
 import { parseArgs } from "node:util";
 import { Redis } from "@upstash/redis";
 
+// Everything before this line runs (runtime startup and imports) counts as import time
+const importMs = performance.now();
+
+// Setting this appends one JSON record per command to the named file
+const telemetryPath = process.env.SKILLS_TELEMETRY;
+
 const { values, positionals } = parseArgs({
   args: process.argv.slice(2),
   options: {
@@ -199,7 +206,71 @@ if (!url || !token) {
   process.exit(1);
 }
 
+// Telemetry for the command: every fetch the client makes is counted, and
+// the time from the last response's headers to the parsed result is decode time
+const telemetry = {
+  httpRequests: 0,
+  requestBytes: 0,
+  responseBytes: 0,
+  firstByteMs: undefined as number | undefined,
+  lastResponseAt: undefined as number | undefined,
+  pending: [] as Promise<void>[],
+};
+
+if (telemetryPath) {
+  const originalFetch = globalThis.fetch;
+  globalThis.fetch = (async (input: RequestInfo | URL, init?: RequestInit) => {
+    const sent = performance.now();
+    telemetry.httpRequests++;
+    if (typeof init?.body === "string") telemetry.requestBytes += Buffer.byteLength(init.body);
+    const response = await originalFetch(input, init);
+    telemetry.lastResponseAt = performance.now();
+    telemetry.firstByteMs = telemetry.lastResponseAt - sent;
+    // Count the body from a clone so the client can still read the original
+    telemetry.pending.push(
+      response.clone().arrayBuffer().then((body) => {
+        telemetry.responseBytes += body.byteLength;
+      }, () => {})
+    );
+    return response;
+  }) as typeof fetch;
+}
+
+// Milliseconds to seconds, rounded to the microsecond like the Python scripts
+function seconds(ms: number | undefined): number | undefined {
+  return ms === undefined ? undefined : Math.round(ms * 1000) / 1e6;
+}
+
+async function writeTelemetry(stages: Record<string, number | undefined>, error?: string): Promise<void> {
+  if (!telemetryPath) return;
+  await Promise.all(telemetry.pending);
+  const record = {
+    time: new Date(commandStartedAt).toISOString(),
+    script: "upstash-redis-kv",
+    operation: cmd,
+    status: error ? "error" : "ok",
+    import_s: seconds(importMs),
+    client_init_s: seconds(clientInitMs),
+    first_byte_s: seconds(telemetry.firstByteMs),
+    ...Object.fromEntries(Object.entries(stages).map(([name, ms]) => [`${name}_s`, seconds(ms)])),
+    total_s: seconds(performance.now() - commandStart),
+    http_requests: telemetry.httpRequests,
+    request_bytes: telemetry.requestBytes,
+    response_bytes: telemetry.responseBytes,
+    // The client retries failed requests itself; every fetch after the first is a retry
+    retries: Math.max(0, telemetry.httpRequests - 1),
+    error,
+  };
+  try {
+    appendFileSync(telemetryPath, JSON.stringify(record) + "\n");
+  } catch (err) {
+    console.error(`Warning: could not write telemetry to ${telemetryPath}: ${err instanceof Error ? err.message : err}`);
+  }
+}
+
+const clientInitStart = performance.now();
 const redis = new Redis({ url, token });
+const clientInitMs = performance.now() - clientInitStart;
 const [rawCmd, ...args] = positionals;
 const cmd = rawCmd.toUpperCase();
 
@@ -730,8 +801,12 @@ async function execute(): Promise<any> {
   }
 }
 
+const commandStartedAt = Date.now();
+const commandStart = performance.now();
+
 try {
   const result = await execute();
+  const resultAt = performance.now();
 
   if (result === null || result === undefined) {
     console.log("(nil)");
@@ -740,7 +815,16 @@ try {
   } else {
     console.log(result);
   }
+
+  const responseAt = telemetry.lastResponseAt ?? resultAt;
+  await writeTelemetry({
+    request: responseAt - commandStart,
+    decode: resultAt - responseAt,
+    write: performance.now() - resultAt,
+  });
 } catch (err) {
-  console.error(`Error: ${err instanceof Error ? err.message : err}`);
+  const message = err instanceof Error ? err.message : String(err);
+  await writeTelemetry({ request: performance.now() - commandStart }, message);
+  console.error(`Error: ${message}`);
   process.exit(1);
 }
@@ -4,16 +4,209 @@
 # dependencies = ["youtube-transcript-api>=1.0.0"]
 # ///
 """
-Extract transcript from a YouTube video.
+Extract transcripts from YouTube videos.
 
 Usage:
     uv run scripts/get_transcript.py <video_id_or_url> [--timestamps]
+    uv run scripts/get_transcript.py <video> <video> ... [--out-dir DIR | --jsonl]
+    uv run scripts/get_transcript.py --input-file videos.txt [--workers N]
+    uv run scripts/get_transcript.py --daemon
 """
 
 import sys
+import os
+import io
 import re
+import json
+import time
+import zlib
+import struct
+import random
+import signal
+import socket
+import sqlite3
 import argparse
-from youtube_transcript_api import YouTubeTranscriptApi
+import threading
+import contextlib
+import itertools
+import contextvars
+import socketserver
+from collections import deque
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Base URL of a transcript endpoint to use instead of YouTube (for testing).
+# GET {url}/{video_id}?languages=en,de must return
+# {"language_code": ..., "is_generated": ..., "snippets": [{"text", "start", "duration"}, ...]}
+STUB_URL_ENV = "YOUTUBE_TRANSCRIPT_URL"
+
+# Override for the transcript cache location (default: ~/.cache/youtube-transcript/)
+CACHE_PATH_ENV = "YOUTUBE_TRANSCRIPT_CACHE"
+DEFAULT_CACHE_TTL_DAYS = 30
+DEFAULT_CACHE_MAX_MB = 256
+# Override for the daemon's Unix socket (default: next to the cache database)
+SOCKET_PATH_ENV = "YOUTUBE_TRANSCRIPT_SOCKET"
+# Bumped whenever the stored transcript encoding changes
+CACHE_VERSION = 4
+
+# Paragraph reflow: start a new paragraph at a sentence end followed by a
+# pause of at least PARAGRAPH_PAUSE seconds, or after PARAGRAPH_MAX_SENTENCES.
+# Unpunctuated (auto-generated) captions break on pauses, and at the next
+# snippet boundary once a paragraph reaches PARAGRAPH_MAX_WORDS (their
+# snippets usually overlap, so there is often no gap at all).
+PARAGRAPH_PAUSE = 2.0
+PARAGRAPH_MAX_SENTENCES = 6
+PARAGRAPH_MAX_WORDS = 150
+SENTENCE_END = re.compile(r'[.!?…]["\')\]”’]*$')
+
+# Minimum number of words a snippet must repeat from the previous one to be
+# treated as a rolling-caption overlap rather than a genuine repetition
+DEDUPE_MIN_WORDS = 2
+
+# Output formats and the file extension used for them with --out-dir
+OUTPUT_EXTENSIONS = {"text": ".txt", "srt": ".srt", "vtt": ".vtt", "jsonl": ".jsonl"}
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"RequestBlocked", "IpBlocked", "YouTubeRequestFailed"}
+
+# Setting this appends one JSON record per transcript fetch to the named file
+TELEMETRY_ENV = "SKILLS_TELEMETRY"
+
+# The fetch whose HTTP requests are being made on this thread
+_current_call = contextvars.ContextVar("telemetry_call", default=None)
+
+
+class Telemetry:
+    """Per-call timings and sizes, appended as JSON lines to $SKILLS_TELEMETRY.
+
+    Process-wide stages (imports, HTTP session and API setup) are measured
+    once and repeated in every record the process writes.
+    """
+
+    def __init__(self, script: str):
+        self.script = script
+        self.path = os.environ.get(TELEMETRY_ENV)
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[f"{name}_s"] = round(time.perf_counter() - start, 6)
+
+    def call(self, operation: str, **fields) -> "TelemetryCall":
+        return TelemetryCall(self, operation, fields)
+
+    def write(self, record: dict):
+        if not self.path:
+            return
+        line = (json.dumps(record) + "\n").encode()
+        try:
+            # A single O_APPEND write keeps records whole across threads and processes
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            print(f"Warning: could not write telemetry to {self.path}: {e}", file=sys.stderr)
+
+
+class TelemetryCall:
+    """Timings, sizes and retries of one fetch, written when its with block exits.
+
+    The fetch runs on a worker thread (see activate) while its output is
+    written on the main thread, so the record spans both.
+    """
+
+    def __init__(self, telemetry: Telemetry, operation: str, fields: dict):
+        self.telemetry = telemetry
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.fields = {"operation": operation, **fields}
+        self.stages = {}
+        self.counts = {"http_requests": 0, "request_bytes": 0, "response_bytes": 0, "retries": 0}
+        self.error = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if isinstance(exc, Exception) and self.error is None:
+            self.error = str(exc)
+        self.telemetry.write(self.record())
+        return False
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Attribute the HTTP requests, retries and stages of this thread to the call."""
+        token = _current_call.set(self)
+        try:
+            yield self
+        finally:
+            _current_call.reset(token)
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            key = f"{name}_s"
+            self.stages[key] = round(self.stages.get(key, 0) + time.perf_counter() - start, 6)
+
+    def fail(self, error):
+        self.error = str(error)
+
+    def on_response(self, response):
+        body = response.request.body or b""
+        self.counts["http_requests"] += 1
+        self.counts["request_bytes"] += len(body.encode() if isinstance(body, str) else body)
+        self.counts["response_bytes"] += len(response.content)
+        # elapsed runs from sending the request until its headers were parsed;
+        # a fetch makes several requests, and only the first one is recorded
+        self.stages.setdefault("first_byte_s", round(response.elapsed.total_seconds(), 6))
+
+    def record(self) -> dict:
+        record = {
+            "time": datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec="milliseconds"),
+            "script": self.telemetry.script,
+            **self.fields,
+            "status": "error" if self.error else "ok",
+            **self.telemetry.stages,
+            **self.stages,
+            "total_s": round(time.perf_counter() - self.start, 6),
+            **self.counts,
+        }
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+TELEMETRY = Telemetry("youtube-transcript")
+
+
+@contextlib.contextmanager
+def traced(stage: str):
+    """Add the time spent in the block to a stage of the current call, if there is one."""
+    call = _current_call.get()
+    if call is None:
+        yield
+        return
+    with call.stage(stage):
+        yield
+
+
+def record_response(response, *args, **kwargs):
+    """requests response hook that adds each response to the current call."""
+    if call := _current_call.get():
+        call.on_response(response)
 
 
 def extract_video_id(url_or_id: str) -> str:
@@ -39,34 +232,1028 @@ def format_timestamp(seconds: float) -> str:
     return f"{minutes:02d}:{secs:02d}"
 
 
+def parse_time(value: str) -> float:
+    """Parse seconds, MM:SS or HH:MM:SS into seconds."""
+    seconds = 0.0
+    for part in value.split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+class Transcript:
+    """Transcript snippets stored in parallel arrays instead of one object per snippet.
+
+    Start times and durations are array('d'); snippet texts live in one string,
+    with snippet i spanning text[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, video_id: str, language_code: str, is_generated: bool,
+                 starts: array, durations: array, text: str, offsets: array):
+        self.video_id = video_id
+        self.language_code = language_code
+        self.is_generated = is_generated
+        self.starts = starts
+        self.durations = durations
+        self.text = text
+        self.offsets = offsets
+
+    @classmethod
+    def from_snippets(cls, video_id: str, language_code: str, is_generated: bool, snippets) -> "Transcript":
+        """Build a transcript from an iterable of (text, start, duration) tuples."""
+        starts = array("d")
+        durations = array("d")
+        offsets = array("q", [0])
+        texts = []
+        position = 0
+        for text, start, duration in snippets:
+            texts.append(text)
+            starts.append(start)
+            durations.append(duration)
+            position += len(text)
+            offsets.append(position)
+        return cls(video_id, language_code, is_generated, starts, durations, "".join(texts), offsets)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def text_at(self, index: int) -> str:
+        return self.text[self.offsets[index]:self.offsets[index + 1]]
+
+    def texts(self):
+        """Yield each snippet's text in order."""
+        text, offsets = self.text, self.offsets
+        for i in range(len(self.starts)):
+            yield text[offsets[i]:offsets[i + 1]]
+
+    def slice(self, lo: int, hi: int) -> "Transcript":
+        """Return snippets lo..hi-1 as a new transcript."""
+        base = self.offsets[lo]
+        offsets = array("q", (o - base for o in self.offsets[lo:hi + 1])) if hi > lo else array("q", [0])
+        return Transcript(
+            self.video_id, self.language_code, self.is_generated,
+            self.starts[lo:hi], self.durations[lo:hi],
+            self.text[base:self.offsets[hi]] if hi > lo else "", offsets,
+        )
+
+    def time_range(self, start: float | None = None, end: float | None = None) -> "Transcript":
+        """Return the snippets overlapping [start, end) seconds, located with bisect."""
+        starts = self.starts
+        lo, hi = 0, len(starts)
+        if start is not None:
+            lo = max(0, bisect_right(starts, start) - 1)
+            if lo < hi and starts[lo] + self.durations[lo] <= start:
+                lo += 1
+        if end is not None:
+            hi = bisect_left(starts, end, lo)
+        return self.slice(lo, max(lo, hi))
+
+    def pack(self) -> bytes:
+        """Serialise the arrays and text buffer into one byte string (little-endian throughout)."""
+        arrays = [self.starts, self.durations, self.offsets]
+        if sys.byteorder == "big":
+            arrays = [array(values.typecode, values) for values in arrays]
+            for values in arrays:
+                values.byteswap()
+        return b"".join((
+            struct.pack("<Q", len(self.starts)),
+            *(values.tobytes() for values in arrays),
+            self.text.encode("utf-8"),
+        ))
+
+    @classmethod
+    def unpack(cls, video_id: str, language_code: str, is_generated: bool, data: bytes) -> "Transcript":
+        """Inverse of pack()."""
+        (count,) = struct.unpack_from("<Q", data)
+        position = 8
+        arrays = []
+        for typecode, length in (("d", count), ("d", count), ("q", count + 1)):
+            values = array(typecode)
+            end = position + length * values.itemsize
+            values.frombytes(data[position:end])
+            if sys.byteorder == "big":
+                values.byteswap()
+            arrays.append(values)
+            position = end
+        starts, durations, offsets = arrays
+        return cls(video_id, language_code, is_generated, starts, durations,
+                   data[position:].decode("utf-8"), offsets)
+
+
+def format_cue_time(seconds: float, separator: str = ",") -> str:
+    """Format seconds as HH:MM:SS,mmm (SRT) or HH:MM:SS.mmm (WebVTT) using integer arithmetic."""
+    hours, ms = divmod(round(seconds * 1000), 3_600_000)
+    minutes, ms = divmod(ms, 60_000)
+    secs, ms = divmod(ms, 1000)
+    return "%02d:%02d:%02d%s%03d" % (hours, minutes, secs, separator, ms)
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiter with one bucket per host."""
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, host: str):
+        """Block until a request to host is allowed."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                tokens, updated = self.buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - updated) * self.rate)
+                if tokens >= 1:
+                    self.buckets[host] = (tokens - 1, now)
+                    return
+                self.buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+
+def create_session(limiter: RateLimiter, pool_size: int):
+    """Create a keep-alive HTTP session that rate-limits every request by host."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    class RateLimitedAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            limiter.acquire(urlsplit(request.url).hostname or "")
+            return super().send(request, **kwargs)
+
+    session = requests.Session()
+    adapter = RateLimitedAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if TELEMETRY.path:
+        session.hooks["response"].append(record_response)
+    return session
+
+
+class YouTubeFetcher:
+    """Fetch transcripts from YouTube through one shared YouTubeTranscriptApi."""
+
+    def __init__(self, session):
+        # Import here so that failing argument parsing stays fast
+        from youtube_transcript_api import YouTubeTranscriptApi
+        # Shared by all worker threads: the API keeps no per-request state
+        # beyond the session's cookie jar, which locks its own updates
+        self.api = YouTubeTranscriptApi(http_client=session)
+
+    def fetch(self, video_id: str, languages: list[str]) -> Transcript:
+        transcript = self.api.fetch(video_id, languages=languages)
+        with traced("decode"):
+            return Transcript.from_snippets(
+                video_id, transcript.language_code, transcript.is_generated,
+                ((s.text, s.start, s.duration) for s in transcript.snippets),
+            )
+
+
+class StubFetcher:
+    """Fetch transcripts from a local JSON endpoint (see STUB_URL_ENV)."""
+
+    def __init__(self, session, base_url: str):
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+
+    def fetch(self, video_id: str, languages: list[str]) -> Transcript:
+        response = self.session.get(
+            f"{self.base_url}/{video_id}",
+            params={"languages": ",".join(languages)},
+            timeout=30,
+        )
+        response.raise_for_status()
+        with traced("decode"):
+            data = response.json()
+            return Transcript.from_snippets(
+                video_id, data["language_code"], data["is_generated"],
+                ((s["text"], s["start"], s["duration"]) for s in data["snippets"]),
+            )
+
+
+def is_retryable(error: Exception) -> bool:
+    """Return True for rate limiting, server errors and network failures."""
+    import requests
+
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRYABLE_STATUS
+    if isinstance(error, requests.RequestException):
+        return True
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+def fetch_with_retry(fetcher, video_id: str, languages: list[str], retries: int = 3,
+                     backoff: float = 1.0, max_backoff: float = 30.0) -> Transcript:
+    """Fetch a transcript, retrying transient failures with full-jitter exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            return fetcher.fetch(video_id, languages)
+        except Exception as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+            if call := _current_call.get():
+                call.counts["retries"] += 1
+            time.sleep(random.uniform(0, min(max_backoff, backoff * 2 ** attempt)))
+
+
+def default_cache_path() -> Path:
+    """Return the cache database path, honouring YOUTUBE_TRANSCRIPT_CACHE and XDG_CACHE_HOME."""
+    if os.environ.get(CACHE_PATH_ENV):
+        return Path(os.environ[CACHE_PATH_ENV])
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "youtube-transcript" / "transcripts.sqlite3"
+
+
+def default_socket_path() -> Path:
+    """Return the daemon socket path, honouring YOUTUBE_TRANSCRIPT_SOCKET."""
+    if os.environ.get(SOCKET_PATH_ENV):
+        return Path(os.environ[SOCKET_PATH_ENV])
+    return default_cache_path().parent / "daemon.sock"
+
+
+class TranscriptCache:
+    """SQLite-backed transcript cache with TTL expiry and size-bounded LRU eviction.
+
+    Entries are keyed by video ID, language code and caption kind (manual or
+    generated) and hold the packed Transcript arrays, zlib-compressed, along
+    with the language preferences the transcript was fetched for. The
+    snippet text of every cached transcript is also kept in an FTS5 index,
+    keyed by video ID and start time, for search(). Each transcript's snippets
+    occupy a consecutive rowid range of the index, stored with the entry, so
+    they can be removed without scanning the index.
+    """
+
+    def __init__(self, path: Path, ttl: float, max_bytes: int):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(path), timeout=30, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != CACHE_VERSION:
+            self.db.execute("DROP TABLE IF EXISTS transcripts")
+            self.db.execute("DROP TABLE IF EXISTS snippet_index")
+            self.db.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                video_id TEXT NOT NULL,
+                language TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                requested TEXT NOT NULL,
+                index_first INTEGER,
+                index_last INTEGER,
+                PRIMARY KEY (video_id, language, kind)
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS transcripts_lru ON transcripts (accessed_at)")
+        self.searchable = self._create_index()
+
+    def _create_index(self) -> bool:
+        """Create the full-text index, backfilling it from existing entries. Returns False without FTS5."""
+        exists = self.db.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'snippet_index'"
+        ).fetchone()
+        if exists:
+            return True
+        try:
+            self.db.execute(
+                "CREATE VIRTUAL TABLE snippet_index USING fts5("
+                "text, video_id UNINDEXED, start UNINDEXED, language UNINDEXED, kind UNINDEXED)"
+            )
+        except sqlite3.OperationalError:
+            return False
+        rows = self.db.execute("SELECT video_id, language, kind, data FROM transcripts").fetchall()
+        self.db.execute("BEGIN IMMEDIATE")
+        for video_id, language, kind, data in rows:
+            transcript = Transcript.unpack(video_id, language, kind == "generated", zlib.decompress(data))
+            self.db.execute(
+                "UPDATE transcripts SET index_first = ?, index_last = ?"
+                " WHERE video_id = ? AND language = ? AND kind = ?",
+                (*self._index(transcript, kind), video_id, language, kind),
+            )
+        self.db.execute("COMMIT")
+        return True
+
+    def _index(self, transcript: Transcript, kind: str) -> tuple[int, int]:
+        """Index the snippets of one transcript and return their rowid range. Must run inside a transaction."""
+        row = self.db.execute("SELECT rowid FROM snippet_index ORDER BY rowid DESC LIMIT 1").fetchone()
+        first = row[0] + 1 if row else 1
+        key = (transcript.video_id, transcript.language_code, kind)
+        self.db.executemany(
+            "INSERT INTO snippet_index (rowid, text, video_id, start, language, kind) VALUES (?, ?, ?, ?, ?, ?)",
+            ((rowid, text, *key[:1], start, *key[1:])
+             for rowid, text, start in zip(itertools.count(first), transcript.texts(), transcript.starts)),
+        )
+        return first, first + len(transcript.starts) - 1
+
+    def _unindex(self, ranges):
+        """Remove the indexed snippets in the given rowid ranges. Must run inside a transaction."""
+        self.db.executemany(
+            "DELETE FROM snippet_index WHERE rowid BETWEEN ? AND ?",
+            ((first, last) for first, last in ranges if first is not None),
+        )
+
+    def search(self, query: str, limit: int = 20, video_id: str | None = None) -> list[tuple]:
+        """Return (video_id, start, snippet text, rank) for the best matches of an FTS5 query.
+
+        Queries that are not valid FTS5 syntax are retried with every term quoted.
+        """
+        if not self.searchable:
+            raise RuntimeError("SQLite on this system was built without FTS5 full-text search")
+        sql = ("SELECT video_id, start, text, rank FROM snippet_index WHERE snippet_index MATCH ?"
+               + (" AND video_id = ?" if video_id else "") + " ORDER BY rank LIMIT ?")
+        for match in (query, " ".join('"' + term.replace('"', '""') + '"' for term in query.split())):
+            params = (match, video_id, limit) if video_id else (match, limit)
+            try:
+                with self.lock:
+                    return self.db.execute(sql, params).fetchall()
+            except sqlite3.OperationalError:
+                continue
+        return []
+
+    def get(self, video_id: str, languages: list[str]) -> Transcript | None:
+        """Return the cached transcript a fresh fetch would return, manual captions first.
+
+        An entry for a lower-priority language only counts when it was fetched
+        after every preferred language ahead of it turned out to be missing;
+        otherwise None is returned so the preferred language is tried upstream.
+        """
+        now = time.time()
+        with self.lock:
+            for i, language in enumerate(languages):
+                row = self.db.execute(
+                    "SELECT kind, data, requested FROM transcripts"
+                    " WHERE video_id = ? AND language = ? AND fetched_at >= ?"
+                    " ORDER BY kind = 'manual' DESC LIMIT 1",
+                    (video_id, language, now - self.ttl),
+                ).fetchone()
+                if row:
+                    kind, data, requested = row
+                    requested = json.loads(requested)
+                    # Languages listed before this one were unavailable when it was fetched
+                    unavailable = requested[:requested.index(language)] if language in requested else []
+                    if not set(languages[:i]) <= set(unavailable):
+                        return None
+                    self.db.execute(
+                        "UPDATE transcripts SET accessed_at = ? WHERE video_id = ? AND language = ? AND kind = ?",
+                        (now, video_id, language, kind),
+                    )
+                    return Transcript.unpack(video_id, language, kind == "generated", zlib.decompress(data))
+        return None
+
+    def put(self, transcript: Transcript, languages: list[str]):
+        """Store a transcript fetched for the given language preferences.
+
+        Entries past their TTL and least recently used entries beyond the size
+        limit are evicted.
+        """
+        data = zlib.compress(transcript.pack())
+        kind = "generated" if transcript.is_generated else "manual"
+        now = time.time()
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                key = (transcript.video_id, transcript.language_code, kind)
+                # Index rows of the entry being replaced and of every evicted entry
+                stale = self.db.execute(
+                    "SELECT index_first, index_last FROM transcripts"
+                    " WHERE (video_id = ? AND language = ? AND kind = ?) OR fetched_at < ?",
+                    (*key, now - self.ttl),
+                ).fetchall()
+                self.db.execute("DELETE FROM transcripts WHERE fetched_at < ?", (now - self.ttl,))
+                index_range = self._index(transcript, kind) if self.searchable else (None, None)
+                self.db.execute(
+                    "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (*key, data, len(data), now, now, json.dumps(languages), *index_range),
+                )
+                total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+                if total > self.max_bytes:
+                    rows = self.db.execute(
+                        "SELECT video_id, language, kind, size, index_first, index_last"
+                        " FROM transcripts ORDER BY accessed_at"
+                    ).fetchall()
+                    for video_id, language, kind, size, first, last in rows:
+                        if total <= self.max_bytes:
+                            break
+                        self.db.execute(
+                            "DELETE FROM transcripts WHERE video_id = ? AND language = ? AND kind = ?",
+                            (video_id, language, kind),
+                        )
+                        total -= size
+                        stale.append((first, last))
+                if self.searchable:
+                    self._unindex(stale)
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+
+
+class CachedFetcher:
+    """Serve transcripts from the cache, falling back to a lazily created fetcher."""
+
+    def __init__(self, cache: TranscriptCache, create, refresh: bool = False):
+        self.cache = cache
+        self.create = create
+        self.refresh = refresh
+        self.fetcher = None
+        self.lock = threading.Lock()
+
+    def fetch(self, video_id: str, languages: list[str]) -> Transcript:
+        if not self.refresh:
+            cached = self.cache.get(video_id, languages)
+            if cached:
+                if call := _current_call.get():
+                    call.fields["cached"] = True
+                return cached
+        # Cache hits never pay for importing the API or opening connections
+        with self.lock:
+            if self.fetcher is None:
+                self.fetcher = self.create()
+        transcript = self.fetcher.fetch(video_id, languages)
+        self.cache.put(transcript, languages)
+        return transcript
+
+
+class DaemonError(Exception):
+    """A fetch that failed inside the daemon (after the daemon's own retries)."""
+
+
+def connect_daemon(path: Path) -> socket.socket | None:
+    """Return a connection to a running daemon, or None if there is none."""
+    if not hasattr(socket, "AF_UNIX") or not path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+class DaemonFetcher:
+    """Forward fetches to a running daemon, falling back to fetching directly if it goes away.
+
+    Protocol: the client sends one JSON line {"video_id", "languages"}; the
+    daemon replies with a JSON header line, followed on success by the packed
+    Transcript (see Transcript.pack) of the size given in the header.
+    """
+
+    def __init__(self, path: Path, create_direct):
+        self.path = path
+        self.create_direct = create_direct
+        self.direct = None
+        self.lock = threading.Lock()
+
+    def fetch(self, video_id: str, languages: list[str]) -> Transcript:
+        sock = connect_daemon(self.path)
+        if sock is None:
+            with self.lock:
+                if self.direct is None:
+                    self.direct = self.create_direct()
+            return self.direct.fetch(video_id, languages)
+        if call := _current_call.get():
+            call.fields["daemon"] = True
+        with sock, sock.makefile("rb") as reply:
+            sock.sendall(json.dumps({"video_id": video_id, "languages": languages}).encode() + b"\n")
+            header = json.loads(reply.readline())
+            if not header["ok"]:
+                raise DaemonError(header["error"])
+            return Transcript.unpack(video_id, header["language_code"], header["is_generated"],
+                                     reply.read(header["size"]))
+
+
+def create_direct_fetcher(workers: int, rate: float):
+    """Create a fetcher that talks to YouTube (or the stub endpoint) itself."""
+    stub_url = os.environ.get(STUB_URL_ENV)
+    # Imported up front so that import time is reported apart from setup
+    with TELEMETRY.stage("import"):
+        import requests
+        if not stub_url:
+            import youtube_transcript_api
+    with TELEMETRY.stage("client_init"):
+        session = create_session(RateLimiter(rate), pool_size=workers)
+        if stub_url:
+            return StubFetcher(session, stub_url)
+        return YouTubeFetcher(session)
+
+
+def create_fetcher(workers: int, rate: float, cache: TranscriptCache | None = None,
+                   refresh: bool = False, use_daemon: bool = True):
+    """Create the fetcher shared by all worker threads."""
+    def create():
+        # DaemonFetcher fetches directly whenever no daemon is listening
+        if use_daemon and hasattr(socket, "AF_UNIX"):
+            return DaemonFetcher(default_socket_path(), lambda: create_direct_fetcher(workers, rate))
+        return create_direct_fetcher(workers, rate)
+
+    if cache is not None:
+        return CachedFetcher(cache, create, refresh=refresh)
+    return create()
+
+
+def run_daemon(path: Path, workers: int, rate: float, retries: int):
+    """Serve fetches over a Unix socket from one warm API instance and pooled HTTP session."""
+    if not hasattr(socket, "AF_UNIX"):
+        raise RuntimeError("--daemon requires Unix domain sockets")
+    sock = connect_daemon(path)
+    if sock is not None:
+        sock.close()
+        raise RuntimeError(f"A daemon is already listening on {path}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()  # Stale socket from a daemon that did not shut down cleanly
+
+    fetcher = create_direct_fetcher(workers, rate)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                request = json.loads(self.rfile.readline())
+                video_id, languages = request["video_id"], request["languages"]
+            except (ValueError, TypeError, KeyError):
+                return  # Not a fetch request, e.g. a liveness check that connects and closes
+            call = TELEMETRY.call("daemon_fetch", video_id=video_id)
+            with call, call.activate():
+                try:
+                    with call.stage("request"):
+                        transcript = fetch_with_retry(fetcher, video_id, languages, retries)
+                except Exception as e:
+                    call.fail(e)
+                    self.wfile.write(json.dumps({"ok": False, "error": str(e)}).encode() + b"\n")
+                    return
+                with call.stage("write"):
+                    data = transcript.pack()
+                    header = {"ok": True, "language_code": transcript.language_code,
+                              "is_generated": transcript.is_generated, "size": len(data)}
+                    self.wfile.write(json.dumps(header).encode() + b"\n" + data)
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    old_umask = os.umask(0o177)  # Socket readable and writable by this user only
+    try:
+        server = Server(str(path), Handler)
+    finally:
+        os.umask(old_umask)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"Transcript daemon listening on {path}", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        path.unlink(missing_ok=True)
+
+
+def overlap_length(previous: list[str], current: list[str]) -> int:
+    """Return the length of the longest suffix of previous that is a prefix of current.
+
+    Uses the KMP failure function over current + sentinel + tail of previous,
+    so the cost is linear in the number of words compared.
+    """
+    tail = previous[-len(current):] if current else []
+    sequence = current + [None] + tail
+    failure = [0] * len(sequence)
+    k = 0
+    for i in range(1, len(sequence)):
+        while k and sequence[i] != sequence[k]:
+            k = failure[k - 1]
+        if sequence[i] == sequence[k]:
+            k += 1
+        failure[i] = k
+    return failure[-1] if tail else 0
+
+
+def dedupe_transcript(transcript: Transcript) -> Transcript:
+    """Remove words that a snippet repeats from the end of the previous snippet.
+
+    Auto-generated captions roll: each snippet often starts with the last few
+    words of the one before. The repeated words are kept only in the earlier
+    snippet, so each phrase retains its first timestamp; snippets left empty
+    are dropped.
+    """
+    def snippets():
+        previous = []
+        for text, start, duration in zip(transcript.texts(), transcript.starts, transcript.durations):
+            words = text.split()
+            keys = [w.casefold() for w in words]
+            overlap = overlap_length(previous, keys)
+            previous = keys
+            if overlap >= DEDUPE_MIN_WORDS or (overlap and overlap == len(words)):
+                words = words[overlap:]
+                if not words:
+                    continue
+                text = " ".join(words)
+            yield text, start, duration
+
+    return Transcript.from_snippets(transcript.video_id, transcript.language_code,
+                                    transcript.is_generated, snippets())
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate LLM tokens at ~4 characters per token."""
+    return max(1, (len(text) + 3) // 4)
+
+
+def sentence_units(transcript: Transcript):
+    """Yield (start, end, text) for each sentence, or for each snippet if captions are unpunctuated.
+
+    A sentence starts at the start time of the snippet it begins in and ends
+    at the end time of the snippet it finishes in.
+    """
+    starts, durations = transcript.starts, transcript.durations
+    punctuated = any(SENTENCE_END.search(word) for text in transcript.texts() for word in text.split())
+    words = []
+    unit_start = 0.0
+    for i, text in enumerate(transcript.texts()):
+        snippet_words = text.split()
+        if not snippet_words:
+            continue
+        end = starts[i] + durations[i]
+        if not punctuated:
+            yield starts[i], end, " ".join(snippet_words)
+            continue
+        for word in snippet_words:
+            if not words:
+                unit_start = starts[i]
+            words.append(word)
+            if SENTENCE_END.search(word):
+                yield unit_start, end, " ".join(words)
+                words = []
+    if words:
+        yield unit_start, starts[-1] + durations[-1], " ".join(words)
+
+
+def split_unit(unit: tuple, max_tokens: int):
+    """Split a unit longer than max_tokens at word boundaries, keeping its time span."""
+    start, end, text = unit
+    if estimate_tokens(text) <= max_tokens:
+        yield unit
+        return
+    words = []
+    length = 0
+    for word in text.split():
+        if words and (length + 1 + len(word) + 3) // 4 > max_tokens:
+            yield start, end, " ".join(words)
+            words, length = [], 0
+        length += len(word) + (1 if words else 0)
+        words.append(word)
+    if words:
+        yield start, end, " ".join(words)
+
+
+def chunk_transcript(transcript: Transcript, max_tokens: int, overlap_tokens: int = 0):
+    """Yield chunk records of at most max_tokens estimated tokens, split at sentence boundaries.
+
+    Each chunk after the first repeats whole trailing sentences of the
+    previous chunk totalling at most overlap_tokens.
+    """
+    chunk = deque()
+    tokens = 0
+    index = 0
+    new_units = False
+
+    def record():
+        return {
+            "video_id": transcript.video_id,
+            "chunk": index,
+            "start": round(chunk[0][0], 3),
+            "end": round(chunk[-1][1], 3),
+            "timestamp": format_timestamp(chunk[0][0]),
+            "tokens": tokens,
+            "text": " ".join(text for _, _, text in chunk),
+        }
+
+    for sentence in sentence_units(transcript):
+        for unit in split_unit(sentence, max_tokens):
+            unit_tokens = estimate_tokens(unit[2])
+            if new_units and tokens + unit_tokens > max_tokens:
+                yield record()
+                index += 1
+                new_units = False
+                # Keep trailing sentences as overlap, leaving room for the new one
+                budget = min(overlap_tokens, max_tokens - unit_tokens)
+                kept = deque()
+                tokens = 0
+                while chunk and tokens + estimate_tokens(chunk[-1][2]) <= budget:
+                    tokens += estimate_tokens(chunk[-1][2])
+                    kept.appendleft(chunk.pop())
+                chunk = kept
+            chunk.append(unit)
+            tokens += unit_tokens
+            new_units = True
+    if new_units:
+        yield record()
+
+
+def reflow_paragraphs(transcript: Transcript):
+    """Yield (start time, paragraph) pairs, regrouping snippet words into paragraphs.
+
+    Runs in a single pass over the snippets. Words are only re-spaced, never
+    altered, added or dropped.
+    """
+    starts, durations = transcript.starts, transcript.durations
+    count = len(starts)
+    punctuated = any(SENTENCE_END.search(word) for text in transcript.texts() for word in text.split())
+    words = []
+    sentences = 0
+    paragraph_start = 0.0
+    for i, text in enumerate(transcript.texts()):
+        snippet_words = text.split()
+        if not snippet_words:
+            continue
+        if not words:
+            paragraph_start = starts[i]
+        # Silence between the end of this snippet and the start of the next
+        gap = starts[i + 1] - (starts[i] + durations[i]) if i + 1 < count else 0.0
+        last = len(snippet_words) - 1
+        for j, word in enumerate(snippet_words):
+            words.append(word)
+            at_pause = j == last and gap >= PARAGRAPH_PAUSE
+            if punctuated:
+                if not SENTENCE_END.search(word):
+                    continue
+                sentences += 1
+                if not (at_pause or sentences >= PARAGRAPH_MAX_SENTENCES):
+                    continue
+            elif not (at_pause or (j == last and len(words) >= PARAGRAPH_MAX_WORDS)):
+                continue
+            yield paragraph_start, " ".join(words)
+            words = []
+            sentences = 0
+            paragraph_start = starts[i + 1] if j == last and i + 1 < count else starts[i]
+    if words:
+        yield paragraph_start, " ".join(words)
+
+
+def write_transcript(transcript: Transcript, out, fmt: str = "text",
+                     with_timestamps: bool = False, paragraphs: bool = False):
+    """Write a transcript to a text stream one snippet (or paragraph) at a time.
+
+    fmt is "text" (plain or [MM:SS] lines, or paragraphs), "srt", "vtt", or
+    "jsonl" (one {"video_id", "start", "duration", "text"} record per snippet).
+    """
+    write = out.write
+    snippets = zip(transcript.starts, transcript.durations, transcript.texts())
+    if fmt == "srt" or fmt == "vtt":
+        separator = "," if fmt == "srt" else "."
+        if fmt == "vtt":
+            write("WEBVTT\n\n")
+        for index, (start, duration, text) in enumerate(snippets, 1):
+            # A blank line would end the cue early
+            text = "\n".join(line for line in text.splitlines() if line.strip())
+            cue = f"{format_cue_time(start, separator)} --> {format_cue_time(start + duration, separator)}\n{text}\n\n"
+            write(f"{index}\n{cue}" if fmt == "srt" else cue)
+    elif fmt == "jsonl":
+        prefix = '{"video_id": %s, "start": ' % json.dumps(transcript.video_id)
+        for start, duration, text in snippets:
+            write(f'{prefix}{start!r}, "duration": {duration!r}, "text": {json.dumps(text)}}}\n')
+    elif paragraphs:
+        for index, (start, text) in enumerate(reflow_paragraphs(transcript)):
+            if index:
+                write("\n")
+            write(f"[{format_timestamp(start)}] {text}\n" if with_timestamps else f"{text}\n")
+    elif with_timestamps:
+        for start, _, text in snippets:
+            write(f"[{format_timestamp(start)}] {text}\n")
+    else:
+        for text in transcript.texts():
+            write(f"{text}\n")
+
+
+def format_transcript(transcript: Transcript, with_timestamps: bool = False, paragraphs: bool = False,
+                      fmt: str = "text") -> str:
+    """Format a transcript as one string (see write_transcript)."""
+    buffer = io.StringIO()
+    write_transcript(transcript, buffer, fmt, with_timestamps, paragraphs)
+    return buffer.getvalue().removesuffix("\n")
+
+
 def get_transcript(video_id: str, with_timestamps: bool = False) -> str:
     """Fetch and format transcript for a YouTube video."""
-    api = YouTubeTranscriptApi()
-    transcript = api.fetch(video_id)
-    
-    if with_timestamps:
-        lines = [f"[{format_timestamp(snippet.start)}] {snippet.text}" for snippet in transcript.snippets]
-    else:
-        lines = [snippet.text for snippet in transcript.snippets]
-    
-    return '\n'.join(lines)
+    fetcher = create_fetcher(workers=1, rate=0)
+    return format_transcript(fetch_with_retry(fetcher, video_id, ["en"]), with_timestamps)
+
+
+def fetch_traced(call: TelemetryCall, fetcher, video_id: str, languages: list[str], retries: int) -> Transcript:
+    """fetch_with_retry on a worker thread, attributing its requests to call."""
+    with call.activate(), call.stage("request"):
+        return fetch_with_retry(fetcher, video_id, languages, retries)
+
+
+def read_video_list(path: str) -> list[str]:
+    """Read video IDs or URLs, one per line, from a file or stdin ("-")."""
+    f = sys.stdin if path == "-" else open(path)
+    try:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def search_main(argv: list[str]):
+    """Search the snippets of all cached transcripts."""
+    parser = argparse.ArgumentParser(prog='get_transcript.py search',
+                                     description='Search cached YouTube transcripts')
+    parser.add_argument('query', help='Words or phrase to find (FTS5 syntax, e.g. "exact phrase", a OR b)')
+    parser.add_argument('--limit', '-n', type=int, default=20, help='Maximum number of hits (default: 20)')
+    parser.add_argument('--video', help='Only search this video (URL or ID)')
+    parser.add_argument('--jsonl', action='store_true', help='Output one JSON record per hit')
+    args = parser.parse_args(argv)
+
+    try:
+        video_id = extract_video_id(args.video) if args.video else None
+        cache = TranscriptCache(default_cache_path(), ttl=DEFAULT_CACHE_TTL_DAYS * 86400,
+                                max_bytes=DEFAULT_CACHE_MAX_MB * 1024 * 1024)
+        hits = cache.search(args.query, limit=args.limit, video_id=video_id)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for hit_video, start, text, rank in hits:
+        url = f"https://youtu.be/{hit_video}?t={int(start)}"
+        if args.jsonl:
+            print(json.dumps({"video_id": hit_video, "start": start, "timestamp": format_timestamp(start),
+                              "text": text, "url": url, "score": -rank}))
+        else:
+            print(f"{hit_video} [{format_timestamp(start)}] {text}  {url}")
+    if not hits:
+        print("No matches found.", file=sys.stderr)
 
 
 def main():
-    parser = argparse.ArgumentParser(description='Get YouTube video transcript')
-    parser.add_argument('video', help='YouTube video URL or video ID')
-    parser.add_argument('--timestamps', '-t', action='store_true', 
+    if len(sys.argv) > 1 and sys.argv[1] == 'search':
+        search_main(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description='Get YouTube video transcripts',
+                                     epilog='Use "get_transcript.py search QUERY" to search cached transcripts.')
+    parser.add_argument('videos', nargs='*', metavar='video',
+                        help='YouTube video URLs or IDs ("-" reads a list from stdin)')
+    parser.add_argument('--input-file', '-i', action='append', default=[],
+                        help='File with one video URL or ID per line ("-" for stdin)')
+    parser.add_argument('--timestamps', '-t', action='store_true',
                         help='Include timestamps in output')
+    parser.add_argument('--format', '-f', choices=list(OUTPUT_EXTENSIONS), default='text',
+                        help='Output format: text (default), srt, vtt, or jsonl (one record per snippet)')
+    parser.add_argument('--paragraphs', '-p', action='store_true',
+                        help='Reflow snippets into paragraphs at sentence ends and pauses')
+    parser.add_argument('--dedupe', action='store_true',
+                        help='Remove words repeated between consecutive (rolling) captions')
+    parser.add_argument('--chunk-tokens', type=int, metavar='N',
+                        help='Emit JSONL chunks of at most N estimated tokens, split at sentence boundaries')
+    parser.add_argument('--overlap', type=int, default=0, metavar='M',
+                        help='Tokens of trailing sentences repeated at the start of each chunk (with --chunk-tokens)')
+    parser.add_argument('--start', type=parse_time,
+                        help='Only include snippets from this time (seconds, MM:SS or HH:MM:SS)')
+    parser.add_argument('--end', type=parse_time,
+                        help='Only include snippets before this time (seconds, MM:SS or HH:MM:SS)')
+    parser.add_argument('--language', '-l', action='append',
+                        help='Preferred transcript language, repeatable (default: en)')
+    parser.add_argument('--out-dir', '-o',
+                        help='Write each transcript to DIR/<id>-transcript.txt (default for multiple videos: .)')
+    parser.add_argument('--jsonl', action='store_true',
+                        help='Stream one JSON record per video to stdout')
+    parser.add_argument('--workers', '-w', type=int, default=4,
+                        help='Concurrent fetches (default: 4)')
+    parser.add_argument('--rate', type=float, default=5.0,
+                        help='Maximum HTTP requests per second per host, 0 for unlimited (default: 5)')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='Retries for rate-limited or failed requests (default: 3)')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Run a long-lived fetch server on a Unix socket for later invocations to use')
+    parser.add_argument('--no-daemon', action='store_true',
+                        help='Fetch directly even if a daemon is running')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Bypass the local transcript cache')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Re-fetch transcripts and update the cache')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_CACHE_TTL_DAYS,
+                        help=f'Days before cached transcripts expire (default: {DEFAULT_CACHE_TTL_DAYS})')
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_CACHE_MAX_MB,
+                        help=f'Cache size limit in MB (default: {DEFAULT_CACHE_MAX_MB})')
     args = parser.parse_args()
-    
+
+    if args.daemon:
+        try:
+            run_daemon(default_socket_path(), args.workers, args.rate, args.retries)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    sources = [v for v in args.videos if v != '-']
+    if '-' in args.videos:
+        args.input_file.append('-')
+    for path in args.input_file:
+        sources.extend(read_video_list(path))
+    if not sources:
+        parser.error('no videos given')
+    if args.chunk_tokens is not None and args.chunk_tokens < 1:
+        parser.error('--chunk-tokens must be at least 1')
+
+    video_ids = []
+    failures = 0
+    for source in sources:
+        try:
+            video_id = extract_video_id(source)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            failures += 1
+            continue
+        if video_id not in video_ids:
+            video_ids.append(video_id)
+
+    languages = args.language or ["en"]
+    # A single video keeps the original behaviour of printing to stdout
+    to_stdout = len(sources) == 1 and not args.out_dir and not args.jsonl
+    out_dir = Path(args.out_dir or ".")
+    if not to_stdout and not args.jsonl:
+        out_dir.mkdir(parents=True, exist_ok=True)
+
     try:
-        video_id = extract_video_id(args.video)
-        transcript = get_transcript(video_id, with_timestamps=args.timestamps)
-        print(transcript)
+        cache = None
+        if not args.no_cache:
+            cache = TranscriptCache(default_cache_path(), ttl=args.cache_ttl * 86400,
+                                    max_bytes=int(args.cache_max_mb * 1024 * 1024))
+        fetcher = create_fetcher(args.workers, args.rate, cache=cache, refresh=args.refresh,
+                                 use_daemon=not args.no_daemon)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
+    calls = {video_id: TELEMETRY.call("fetch", video_id=video_id) for video_id in video_ids}
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(fetch_traced, calls[video_id], fetcher, video_id, languages, args.retries): video_id
+            for video_id in video_ids
+        }
+        # Write each transcript as soon as it completes
+        for future in as_completed(futures):
+            video_id = futures[future]
+            with calls[video_id] as call:
+                try:
+                    transcript = future.result()
+                except Exception as e:
+                    call.fail(e)
+                    failures += 1
+                    if args.jsonl:
+                        print(json.dumps({"video_id": video_id, "error": str(e)}), flush=True)
+                    print(f"Error: {video_id}: {e}", file=sys.stderr)
+                    continue
+
+                with call.stage("write"):
+                    if args.start is not None or args.end is not None:
+                        transcript = transcript.time_range(args.start, args.end)
+                    if args.dedupe:
+                        before = len(transcript.text)
+                        transcript = dedupe_transcript(transcript)
+                        saved = before - len(transcript.text)
+                        print(f"Dedupe: {video_id}: removed {saved} of {before} characters "
+                              f"({saved / before if before else 0:.1%})", file=sys.stderr)
+                    if args.chunk_tokens:
+                        chunks = chunk_transcript(transcript, args.chunk_tokens, args.overlap)
+                        if to_stdout or args.jsonl:
+                            for chunk in chunks:
+                                print(json.dumps(chunk), flush=True)
+                        else:
+                            path = out_dir / f"{video_id}-chunks.jsonl"
+                            with open(path, "w") as f:
+                                for chunk in chunks:
+                                    f.write(json.dumps(chunk) + "\n")
+                            print(f"Saved: {path}", file=sys.stderr)
+                        continue
+
+                    options = {"fmt": args.format, "with_timestamps": args.timestamps, "paragraphs": args.paragraphs}
+                    if to_stdout or (args.jsonl and args.format == "jsonl"):
+                        write_transcript(transcript, sys.stdout, **options)
+                        sys.stdout.flush()
+                    elif args.jsonl:
+                        record = {
+                            "video_id": video_id,
+                            "language_code": transcript.language_code,
+                            "is_generated": transcript.is_generated,
+                            "text": format_transcript(transcript, **options),
+                        }
+                        print(json.dumps(record), flush=True)
+                    else:
+                        path = out_dir / f"{video_id}-transcript{OUTPUT_EXTENSIONS[args.format]}"
+                        with open(path, "w") as f:
+                            write_transcript(transcript, f, **options)
+                        print(f"Saved: {path}", file=sys.stderr)
+
+    if failures:
+        sys.exit(1)
+
 
 if __name__ == '__main__':
     main()